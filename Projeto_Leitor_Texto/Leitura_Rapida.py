@@ -1,17 +1,36 @@
 import tkinter as tk
-from tkinter import filedialog, messagebox, colorchooser, simpledialog
+from tkinter import filedialog, messagebox, colorchooser, simpledialog, ttk
 import time
 import re
-from docx import Document
 import json
 import os
 from datetime import datetime
 import PyPDF2 
+import threading
+import queue
+import collections
+import hashlib
+import bisect
+import multiprocessing
+import concurrent.futures
+import subprocess
+import tempfile
+import shutil
+import zipfile
+import mmap
+import codecs
+import posixpath
+import xml.etree.ElementTree as ET
 
 # --- Novas importações para OCR ---
 from pdf2image import convert_from_path
 import pytesseract
-from PIL import Image
+from PIL import Image, ImageOps
+
+try:
+    import fitz # PyMuPDF, opcional: outro extrator rápido da camada de texto de PDFs
+except ImportError:
+    fitz = None
 
 # --- CONFIGURAÇÃO DO TESSERACT OCR ---
 TESSERACT_CMD_PATH = r'C:\Program Files\Tesseract-OCR\tesseract.exe' # **AJUSTE AQUI SE NECESSÁRIO**
@@ -23,79 +42,1781 @@ else:
 
 
 # --- Funções de Leitura de Arquivos ---
+# Estas funções podem rodar fora da thread do Tkinter, por isso não abrem caixas de diálogo:
+# erros são sinalizados com ErroLeituraArquivo e avisos/progresso através de callbacks.
+# As funções iterar_* entregam o texto aos poucos (parágrafo a parágrafo ou página a página),
+# permitindo começar a leitura antes de o documento inteiro ser extraído.
+
+OCR_PAGINAS_POR_LOTE = 4 # Páginas rasterizadas por chamada ao poppler durante a leitura em fluxo
+OCR_LOTES_POR_PROCESSO = 2 # Intervalos de OCR em andamento por processo do pool (limita páginas em disco/memória)
+OCR_DPI = 300
+OCR_IDIOMA = 'por+eng' # Usado quando o idioma do documento não pode ser detectado
+OCR_TEMPO_LIMITE_PAGINA = 120 # Segundos que o Tesseract (ou o poppler) pode gastar numa página antes de ser interrompido
+OCR_DPI_MINIMO_REPETICAO = 72 # Menor resolução usada ao repetir uma página que estourou o tempo
+# OCR em dois níveis: primeiro uma passada rápida em baixa resolução (tons de cinza binarizados); só as páginas
+# cuja confiança média do Tesseract fica abaixo do limite são reconhecidas de novo em alta resolução.
+# Os valores podem ser ajustados em config/settings.json (chaves "ocr_*").
+OPCOES_OCR_PADRAO = {
+    "dois_niveis": True,
+    "dpi_rapido": 150,
+    "dpi_alto": OCR_DPI,
+    "confianca_minima": 70,
+    # "auto": idioma(s) do Tesseract detectados por documento (detectar_idioma_pdf); ou códigos fixos, ex: "por", "spa+eng".
+    # Cada modelo de idioma a mais custa tempo em todas as páginas.
+    "idioma": "auto",
+    # Envia todas as páginas de um intervalo a uma única execução do Tesseract (lista de imagens), em vez de
+    # abrir um processo e recarregar os modelos de idioma a cada página.
+    "em_lote": True,
+    # Antes do OCR, endireita a página e recorta as margens em branco (menos pixels para o Tesseract);
+    # a orientação (páginas de lado ou de cabeça para baixo) é detectada uma vez por documento.
+    "preprocessar": True,
+    "dividir_duplas": True, # Separa digitalizações de duas páginas lado a lado (livro aberto)
+}
+OCR_DENSIDADE_MINIMA = 3.0 # Caracteres por polegada² na camada de texto a partir dos quais a página nunca vai para o OCR
+OCR_COBERTURA_MINIMA = 0.5 # Fração da página coberta por imagens para que ela seja considerada escaneada
+PDF_CLASSIFICACAO_VERSAO = 2 # Incremente ao mudar classificar_pagina_pdf (invalida o cache de documentos PDF)
+PDF_PAGINAS_CALIBRACAO = 5 # Páginas usadas para comparar os extratores de texto de PDF ao abrir um documento
+PDF_PAGINAS_POR_BLOCO = 16 # Páginas extraídas por chamada ao extrator de texto
+PDF_PAGINAS_MINIMO_PARALELO = 100 # Abaixo disso a camada de texto é extraída num só processo (o pool não compensa)
+PDF_PAGINAS_PRE_ANALISE = 8 # Páginas amostradas para decidir, antes da leitura, se o PDF é digital, escaneado ou misto
+CHECKPOINT_LIMITE_MB = 100 # Espaço máximo dos checkpoints de leituras de PDF interrompidas
+PDF_PALAVRAS_POR_PAGINA_ESTIMADAS = 300 # Estimativa usada no modo sob demanda para páginas ainda não extraídas
+
+# Um trecho extraído de um documento. `pagina` é o índice da página no PDF (None para .docx/.txt),
+# `origem` indica de onde veio o texto: "texto" (camada de texto/arquivo) ou "ocr" e, em .docx, também "tabela",
+# "caixa_texto", "nota_rodape" ou "nota_fim" (ver iterar_trechos_docx; o texto das imagens de um .docx vem como "ocr"); `dpi` é a resolução
+# usada no OCR (para saber em qual nível do OCR em dois níveis a página foi reconhecida).
+# `nivel_titulo` é o nível do título (0 = capítulo) quando o trecho é um título de um .docx, senão None.
+TrechoPagina = collections.namedtuple('TrechoPagina', ['pagina', 'origem', 'texto', 'dpi', 'nivel_titulo'], defaults=(None, None))
+
+# Uma entrada do sumário do documento: `nivel` 0 para capítulos, 1 para seções dentro deles etc.
+# `pagina` é o índice (a partir de 0) da página onde o capítulo começa (PDFs); documentos sem páginas (.docx)
+# indicam direto o índice da primeira palavra do título em `indice_palavra`.
+Capitulo = collections.namedtuple('Capitulo', ['nivel', 'titulo', 'pagina', 'indice_palavra'], defaults=(None,))
+
+class ErroLeituraArquivo(Exception):
+    """Erro ao ler um arquivo, com o título e a mensagem a serem exibidos ao usuário."""
+    def __init__(self, titulo, mensagem):
+        super().__init__(mensagem)
+        self.titulo = titulo
+        self.mensagem = mensagem
+
+# --- Leitura de DOCX ---
+# O .docx é um zip; o texto fica no XML da parte principal (normalmente word/document.xml). Ele é lido em fluxo,
+# direto do zip, sem montar o modelo de objetos do python-docx: a memória não cresce com o tamanho do documento.
+
+W = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+MC = "{http://schemas.openxmlformats.org/markup-compatibility/2006}"
+R = "{http://schemas.openxmlformats.org/officeDocument/2006/relationships}"
+A = "{http://schemas.openxmlformats.org/drawingml/2006/main}"
+V = "{urn:schemas-microsoft-com:vml}"
+# O que entra na leitura de um .docx além dos parágrafos do corpo. Os valores podem ser ajustados em
+# config/settings.json (chaves "docx_*").
+OPCOES_DOCX_PADRAO = {
+    "tabelas": True,
+    "caixas_texto": True,
+    "notas_rodape": True, # Lidas logo depois do parágrafo que as cita
+    "notas_fim": True, # Lidas no fim do documento
+    "imagens": True, # OCR das imagens do corpo (páginas escaneadas coladas como imagem), no lugar onde elas estão
+}
+DOCX_OPCAO_ORIGEM = {"tabela": "tabelas", "caixa_texto": "caixas_texto", "nota_rodape": "notas_rodape", "nota_fim": "notas_fim",
+                     "imagem": "imagens"}
+
+def descrever_opcoes_docx(opcoes_docx):
+    """Descrição curta do que é incluído na leitura de um .docx, usada na chave do cache de documentos (ex: "tcrfi")."""
+    return "".join(letra for letra, opcao in zip("tcrfi", ("tabelas", "caixas_texto", "notas_rodape", "notas_fim", "imagens"))
+                   if opcoes_docx.get(opcao, True)) or "corpo"
+DOCX_IMAGEM_LADO_MINIMO = 300 # Imagens com um lado menor que isso (px) não vão para o OCR: ícones, logotipos, fios
+DOCX_LEITOR_VERSAO = 4 # Incremente ao mudar o que é extraído de um .docx (invalida o cache de documentos .docx)
+DOCX_NIVEL_CORPO = 9 # Nível de estrutura (w:outlineLvl) do texto comum, que não entra no sumário
+_RE_ESTILO_TITULO = re.compile(r"heading\s*(\d)$", re.IGNORECASE)
+
+def _relacoes_docx(arquivo_zip, parte):
+    """Relações de uma parte do .docx: lista de (fim do tipo, parte de destino no zip, id da relação)."""
+    pasta, nome = posixpath.split(parte)
+    relacoes = []
+    try:
+        with arquivo_zip.open(posixpath.join(pasta, "_rels", nome + ".rels")) as rels:
+            for relacao in ET.parse(rels).getroot():
+                if relacao.get("TargetMode") == "External":
+                    continue
+                destino = relacao.get("Target", "")
+                destino = destino.lstrip("/") if destino.startswith("/") else posixpath.join(pasta, destino)
+                relacoes.append((relacao.get("Type", "").rsplit("/", 1)[-1], posixpath.normpath(destino), relacao.get("Id")))
+    except KeyError:
+        pass
+    return relacoes
+
+def _parte_principal_docx(arquivo_zip):
+    """Nome, dentro do zip, da parte com o corpo do documento (indicada em _rels/.rels)."""
+    for tipo, destino, _ in _relacoes_docx(arquivo_zip, ".rels"):
+        if tipo == "officeDocument":
+            return destino
+    return "word/document.xml"
+
+def _niveis_titulo_docx(arquivo_zip, parte_principal):
+    """Nível de título (0 = capítulo) de cada estilo de título do .docx, pelo id do estilo."""
+    estilos = {}
+    for tipo, destino, _ in _relacoes_docx(arquivo_zip, parte_principal):
+        if tipo != "styles":
+            continue
+        try:
+            with arquivo_zip.open(destino) as xml:
+                raiz = ET.parse(xml).getroot()
+        except KeyError:
+            return {}
+        for estilo in raiz.iter(W + "style"):
+            if estilo.get(W + "type") != "paragraph":
+                continue
+            nome = estilo.find(W + "name")
+            base = estilo.find(W + "basedOn")
+            nivel = estilo.find(f"{W}pPr/{W}outlineLvl")
+            estilos[estilo.get(W + "styleId")] = (nome.get(W + "val", "") if nome is not None else "",
+                                                  base.get(W + "val") if base is not None else None,
+                                                  int(nivel.get(W + "val")) if nivel is not None else None)
+
+    def nivel_do_estilo(id_estilo, visitados=()):
+        if id_estilo not in estilos or id_estilo in visitados:
+            return None
+        nome, base, nivel = estilos[id_estilo]
+        if nivel is not None:
+            return nivel
+        titulo = _RE_ESTILO_TITULO.match(nome)
+        if titulo:
+            return int(titulo.group(1)) - 1
+        return nivel_do_estilo(base, visitados + (id_estilo,))
+
+    niveis = {id_estilo: nivel_do_estilo(id_estilo) for id_estilo in estilos}
+    return {id_estilo: nivel for id_estilo, nivel in niveis.items() if nivel is not None and nivel < DOCX_NIVEL_CORPO}
+
+def _texto_elemento_docx(elemento):
+    """Texto de um elemento de um run (w:t, tabulação, quebra de linha...), como o python-docx o monta."""
+    tag = elemento.tag
+    if tag == W + "t":
+        return elemento.text or ""
+    if tag in (W + "tab", W + "ptab"):
+        return "\t"
+    if tag == W + "br":
+        return "\n" if elemento.get(W + "type", "textWrapping") == "textWrapping" else ""
+    if tag == W + "cr":
+        return "\n"
+    if tag == W + "noBreakHyphen":
+        return "-"
+    return None
+
+def _iterar_paragrafos_parte_docx(xml, niveis_titulo, opcoes_docx, origem_base="texto"):
+    """Lê em fluxo uma parte XML do .docx e gera cada parágrafo com os das caixas de texto ancoradas nele."""
+    pilha = [] # Tags abertas, da raiz até o elemento atual
+    raiz = corpo = None
+    abertos = [] # Parágrafos em andamento (um dentro do outro quando há caixa de texto): dicionários de estado
+    tabelas = caixas = alternativos = 0
+    nota_atual = None
+    for evento, elemento in ET.iterparse(xml, events=("start", "end")):
+        tag = elemento.tag
+        if evento == "start":
+            pilha.append(tag)
+            if raiz is None:
+                raiz = elemento
+            elif tag == W + "body" and len(pilha) == 2:
+                corpo = elemento
+            elif tag == W + "p":
+                origem = "caixa_texto" if caixas else "tabela" if tabelas else origem_base
+                abertos.append({"origem": origem, "partes": [], "nivel": None, "notas": [], "internos": []})
+            elif tag == W + "tbl":
+                tabelas += 1
+            elif tag == W + "txbxContent":
+                caixas += 1
+            elif tag == MC + "Fallback":
+                alternativos += 1
+            elif tag in (W + "footnote", W + "endnote") and len(pilha) == 2:
+                # Separadores de notas (w:type "separator"...) não têm texto de leitura
+                nota_atual = None if elemento.get(W + "type") else elemento.get(W + "id")
+            continue
+
+        pilha.pop()
+        if tag == W + "tbl":
+            tabelas -= 1
+        elif tag == W + "txbxContent":
+            caixas -= 1
+        elif tag == MC + "Fallback":
+            alternativos -= 1
+        elif abertos and not alternativos:
+            paragrafo = abertos[-1]
+            texto = _texto_elemento_docx(elemento)
+            if texto is not None and pilha[-1] == W + "r":
+                paragrafo["partes"].append(texto)
+            elif tag in (W + "footnoteReference", W + "endnoteReference") and pilha[-1] == W + "r":
+                paragrafo["notas"].append(("nota_rodape" if tag == W + "footnoteReference" else "nota_fim", elemento.get(W + "id")))
+            elif tag in (A + "blip", V + "imagedata"): # Imagem (DrawingML ou VML antigo)
+                id_relacao = elemento.get(R + "embed") or elemento.get(R + "id")
+                if id_relacao:
+                    paragrafo["notas"].append(("imagem", id_relacao))
+            elif pilha[-1] == W + "pPr" and pilha[-2] == W + "p": # Propriedades do próprio parágrafo
+                if tag == W + "pStyle" and paragrafo["nivel"] is None:
+                    paragrafo["nivel"] = niveis_titulo.get(elemento.get(W + "val"))
+                elif tag == W + "outlineLvl":
+                    nivel = int(elemento.get(W + "val", DOCX_NIVEL_CORPO))
+                    paragrafo["nivel"] = nivel if nivel < DOCX_NIVEL_CORPO else None
+
+        if tag == W + "p" and abertos:
+            paragrafo = abertos.pop()
+            itens = []
+            if alternativos == 0 and opcoes_docx.get(DOCX_OPCAO_ORIGEM.get(paragrafo["origem"]), True):
+                trecho = TrechoPagina(None, paragrafo["origem"], "".join(paragrafo["partes"]), nivel_titulo=paragrafo["nivel"])
+                itens.append((trecho, nota_atual, paragrafo["notas"]))
+            itens.extend(paragrafo["internos"])
+            elemento.clear()
+            if abertos:
+                abertos[-1]["internos"].extend(itens) # Caixa de texto: sai logo depois do parágrafo em que está ancorada
+            elif itens:
+                yield itens
+        # Elemento de primeiro nível (do corpo ou uma nota) terminado: libera a memória dele
+        if len(pilha) == 1:
+            raiz.clear()
+        elif len(pilha) == 2 and corpo is not None:
+            corpo.clear()
+
+def _ler_notas_docx(arquivo_zip, parte_principal, niveis_titulo, opcoes_docx):
+    """Texto das notas de rodapé e de fim que `opcoes_docx` inclui: {(tipo, id): [TrechoPagina]}."""
+    notas = {}
+    for tipo_relacao, destino, _ in _relacoes_docx(arquivo_zip, parte_principal):
+        origem = {"footnotes": "nota_rodape", "endnotes": "nota_fim"}.get(tipo_relacao)
+        if origem is None or not opcoes_docx.get(DOCX_OPCAO_ORIGEM[origem], True):
+            continue
+        try:
+            with arquivo_zip.open(destino) as xml:
+                for itens in _iterar_paragrafos_parte_docx(xml, niveis_titulo, opcoes_docx, origem):
+                    for trecho, id_nota, _ in itens:
+                        if id_nota is not None:
+                            notas.setdefault((origem, id_nota), []).append(trecho._replace(origem=origem, nivel_titulo=None))
+        except KeyError:
+            continue
+    return notas
+
+def _ocr_imagem_docx(caminho_do_arquivo, parte_imagem, opcoes_ocr=None):
+    """OCR de uma imagem embutida num .docx, lida direto do zip. Executada nos processos do pool de OCR."""
+    opcoes = opcoes_ocr or OPCOES_OCR_PADRAO
+    idioma = OCR_IDIOMA if opcoes["idioma"] == "auto" else opcoes["idioma"]
+    with zipfile.ZipFile(caminho_do_arquivo) as arquivo_zip, arquivo_zip.open(parte_imagem) as dados:
+        try:
+            imagem = Image.open(dados) # Só o cabeçalho é lido aqui: o tamanho é conhecido antes de decodificar
+            if min(imagem.size) < DOCX_IMAGEM_LADO_MINIMO:
+                return ""
+            imagem.load()
+        except (OSError, Image.DecompressionBombError):
+            return ""
+    if imagem.mode not in ("1", "L", "RGB"):
+        imagem = imagem.convert("RGBA")
+        fundo = Image.new("RGB", imagem.size, "white") # Partes transparentes viram papel, não tinta
+        fundo.paste(imagem, mask=imagem.getchannel("A"))
+        imagem = fundo
+    partes = preparar_imagem_ocr(imagem, opcoes.get("dividir_duplas", True)) if opcoes.get("preprocessar") else [imagem]
+    textos = []
+    for parte in partes:
+        try:
+            dados = pytesseract.image_to_data(parte, lang=idioma, output_type=pytesseract.Output.DICT,
+                                              timeout=OCR_TEMPO_LIMITE_PAGINA)
+        except RuntimeError as e:
+            if not _tempo_esgotado(e):
+                raise
+            print(f"Aviso: OCR da imagem '{parte_imagem}' abandonado: passou de {OCR_TEMPO_LIMITE_PAGINA} s.")
+            continue
+        textos.append(texto_e_confianca_ocr(dados)[0])
+    return "\n\n".join(texto for texto in textos if texto.strip())
+
+def chave_cache_ocr_docx(impressao_digital, parte_imagem, opcoes_ocr):
+    return f"{impressao_digital}-{posixpath.basename(parte_imagem)}-{descrever_opcoes_ocr(opcoes_ocr)}"
+
+def iterar_trechos_docx(caminho_do_arquivo, cancelar=None, progresso=None, opcoes_docx=None, num_processos=1, cache_ocr=None,
+                        opcoes_ocr=None):
+    """Gera um TrechoPagina para cada parágrafo de um arquivo .docx, na ordem de leitura, à medida que o XML é lido."""
+    opcoes_docx = opcoes_docx or OPCOES_DOCX_PADRAO
+    opcoes_ocr = opcoes_ocr or OPCOES_OCR_PADRAO
+    ocr_imagens = opcoes_docx.get("imagens", True)
+    paralelo = num_processos > 1
+    executor = None
+    pendentes = collections.deque() # (parte da imagem, texto do OCR ou futuro) ou (None, TrechoPagina pronto), na ordem do documento
+    impressao_digital = None
+    amostra_idioma = [] # Parágrafos lidos antes da primeira imagem, para detectar o idioma do OCR
+    estatisticas = {"imagens": 0, "cache": 0}
+
+    def enviar_imagem(parte_imagem):
+        nonlocal executor, impressao_digital, opcoes_ocr
+        if opcoes_ocr["idioma"] == "auto":
+            idioma = _manter_idiomas_instalados(detectar_idioma_texto("\n".join(amostra_idioma)))
+            print(f"Idioma do OCR das imagens de '{os.path.basename(caminho_do_arquivo)}': "
+                  f"{idioma or OCR_IDIOMA}{'' if idioma else ' (não detectado)'}")
+            opcoes_ocr = dict(opcoes_ocr, idioma=idioma or OCR_IDIOMA)
+        estatisticas["imagens"] += 1
+        if cache_ocr is not None:
+            if impressao_digital is None:
+                impressao_digital = impressao_digital_arquivo(caminho_do_arquivo)
+            texto_cache = cache_ocr.ler(chave_cache_ocr_docx(impressao_digital, parte_imagem, opcoes_ocr))
+            if texto_cache is not None:
+                estatisticas["cache"] += 1
+                if texto_cache:
+                    pendentes.append((None, TrechoPagina(None, "ocr", texto_cache.decode('utf-8'))))
+                return
+        if not paralelo:
+            try:
+                resultado = _ocr_imagem_docx(caminho_do_arquivo, parte_imagem, opcoes_ocr)
+            except pytesseract.TesseractNotFoundError:
+                raise
+            except Exception as ocr_e:
+                print(f"Aviso: Erro ao tentar OCR da imagem '{parte_imagem}': {ocr_e}")
+                return
+            pendentes.append((parte_imagem, resultado))
+            return
+        if executor is None:
+            executor = concurrent.futures.ProcessPoolExecutor(max_workers=num_processos)
+        # Não deixa a leitura do XML correr muito à frente do OCR: no máximo OCR_LOTES_POR_PROCESSO imagens por processo
+        while not (cancelar is not None and cancelar.is_set()):
+            em_andamento = [r for _, r in pendentes if isinstance(r, concurrent.futures.Future) and not r.done()]
+            if len(em_andamento) < OCR_LOTES_POR_PROCESSO * num_processos:
+                break
+            concurrent.futures.wait(em_andamento, timeout=0.2, return_when=concurrent.futures.FIRST_COMPLETED)
+        pendentes.append((parte_imagem, executor.submit(_ocr_imagem_docx, caminho_do_arquivo, parte_imagem, opcoes_ocr)))
+
+    def entregar_prontos(bloquear):
+        while pendentes:
+            parte_imagem, resultado = pendentes[0]
+            if isinstance(resultado, concurrent.futures.Future):
+                if not resultado.done() and not bloquear:
+                    return
+                while not resultado.done():
+                    if cancelar is not None and cancelar.is_set():
+                        return
+                    concurrent.futures.wait([resultado], timeout=0.2)
+                try:
+                    resultado = resultado.result()
+                except Exception as ocr_e:
+                    print(f"Aviso: Erro ao tentar OCR da imagem '{parte_imagem}': {ocr_e}")
+                    resultado = None
+            pendentes.popleft()
+            if isinstance(resultado, TrechoPagina):
+                yield resultado
+                continue
+            if resultado is None:
+                continue
+            if cache_ocr is not None:
+                try:
+                    cache_ocr.gravar(chave_cache_ocr_docx(impressao_digital, parte_imagem, opcoes_ocr), resultado.encode('utf-8'))
+                except OSError as e:
+                    print(f"Aviso: Não foi possível gravar o OCR da imagem '{parte_imagem}' no cache: {e}")
+            if resultado:
+                yield TrechoPagina(None, "ocr", resultado)
 
-def ler_texto_de_docx(caminho_do_arquivo):
-    """Lê o texto de um arquivo .docx e retorna uma lista de parágrafos."""
     try:
-        doc = Document(caminho_do_arquivo)
-        full_text_paragraphs = [p.text for p in doc.paragraphs]
-        return full_text_paragraphs
+        with zipfile.ZipFile(caminho_do_arquivo) as arquivo_zip:
+            parte_principal = _parte_principal_docx(arquivo_zip)
+            niveis_titulo = _niveis_titulo_docx(arquivo_zip, parte_principal)
+            notas = _ler_notas_docx(arquivo_zip, parte_principal, niveis_titulo, opcoes_docx)
+            imagens = {id_relacao: destino for tipo, destino, id_relacao in _relacoes_docx(arquivo_zip, parte_principal)
+                       if tipo == "image"} if ocr_imagens else {}
+            ocr_disponivel = os.path.exists(TESSERACT_CMD_PATH)
+            avisou_tesseract = False
+            numeros = collections.Counter() # Notas citadas até agora, por tipo (numeração na ordem das citações)
+            notas_fim = []
+            n = 0
+
+            def numerar(tipo, id_nota):
+                numeros[tipo] += 1
+                trechos = notas.get((tipo, id_nota), [])
+                if not trechos:
+                    return []
+                # Cópia numerada: uma nota citada duas vezes não pode acumular os números em `notas`
+                return [trechos[0]._replace(texto=f"[{numeros[tipo]}] {trechos[0].texto}")] + trechos[1:]
+
+            with arquivo_zip.open(parte_principal) as xml:
+                for itens in _iterar_paragrafos_parte_docx(xml, niveis_titulo, opcoes_docx):
+                    for trecho, _, citadas in itens:
+                        if cancelar is not None and cancelar.is_set():
+                            return
+                        n += 1
+                        if progresso and n % 200 == 0:
+                            progresso("Lendo DOCX", n, 0)
+                        pendentes.append((None, trecho))
+                        if imagens and not estatisticas["imagens"] and len(amostra_idioma) < IDIOMA_PAGINAS_AMOSTRA * 100:
+                            amostra_idioma.append(trecho.texto)
+                        for tipo, id_citado in citadas:
+                            if tipo == "nota_rodape":
+                                pendentes.extend((None, nota) for nota in numerar(tipo, id_citado))
+                            elif tipo == "nota_fim":
+                                notas_fim.extend(numerar(tipo, id_citado))
+                            elif id_citado in imagens:
+                                if ocr_disponivel:
+                                    enviar_imagem(imagens[id_citado])
+                                elif not avisou_tesseract:
+                                    avisou_tesseract = True
+                                    print(f"Aviso: Tesseract OCR não encontrado; as imagens de "
+                                          f"'{os.path.basename(caminho_do_arquivo)}' não serão lidas.")
+                    yield from entregar_prontos(bloquear=False)
+            yield from entregar_prontos(bloquear=True)
+            if cancelar is not None and cancelar.is_set():
+                return
+            yield from notas_fim
+            if estatisticas["imagens"]:
+                print(f"DOCX '{os.path.basename(caminho_do_arquivo)}': {estatisticas['imagens']} imagens enviadas ao OCR "
+                      f"({estatisticas['cache']} do cache)")
+    except pytesseract.TesseractNotFoundError:
+        raise ErroLeituraArquivo("Erro Tesseract OCR",
+                                 f"Tesseract OCR não encontrado.\n"
+                                 f"Por favor, instale o Tesseract OCR e/ou configure o caminho em 'TESSERACT_CMD_PATH' no código:\n'{TESSERACT_CMD_PATH}'")
     except Exception as e:
-        messagebox.showerror("Erro ao Ler DOCX", f"Não foi possível ler o arquivo DOCX:\n{e}")
-        return None
+        raise ErroLeituraArquivo("Erro ao Ler DOCX", f"Não foi possível ler o arquivo DOCX:\n{e}")
+    finally:
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+def iterar_paragrafos_docx(caminho_do_arquivo, cancelar=None, progresso=None, opcoes_docx=None):
+    """Gera o texto de cada parágrafo de um arquivo .docx (ver iterar_trechos_docx)."""
+    return (trecho.texto for trecho in iterar_trechos_docx(caminho_do_arquivo, cancelar, progresso, opcoes_docx))
+
+TXT_LEITOR_VERSAO = 2 # Incremente ao mudar o que é extraído de um .txt (invalida o cache de documentos .txt)
+TXT_BLOCO_BYTES = 1024 * 1024 # Bytes decodificados de cada vez na leitura de .txt
+TXT_PARAGRAFO_MAXIMO = 1024 * 1024 # Caracteres a partir dos quais um parágrafo sem linhas em branco é entregue em pedaços
+_RE_LINHAS_EM_BRANCO = re.compile(r'\n(?:[^\S\n]*\n)+') # Fim de linha seguido de uma ou mais linhas em branco
+
+def iterar_paragrafos_txt(caminho_do_arquivo, cancelar=None, progresso=None):
+    """Gera os parágrafos (blocos separados por linhas em branco) de um arquivo .txt, lendo-o em blocos."""
+    decodificador = codecs.getincrementaldecoder('utf-8-sig')(errors='replace')
+    resto = "" # Texto depois da última separação de parágrafos, ainda sem o fim
+    retorno = "" # \r no fim do bloco anterior
+    liberado = 0 # Bytes do início do arquivo cujas páginas já foram devolvidas ao sistema
+    n = 0
+    avisou_invalidos = False
+    try:
+        with open(caminho_do_arquivo, 'rb') as arquivo:
+            tamanho = os.fstat(arquivo.fileno()).st_size
+            mapa = mmap.mmap(arquivo.fileno(), 0, access=mmap.ACCESS_READ) if tamanho else b""
+            if tamanho and hasattr(mmap, "MADV_SEQUENTIAL"): # Linux/macOS: leitura antecipada do que vem a seguir
+                mapa.madvise(mmap.MADV_SEQUENTIAL)
+            try:
+                with memoryview(mapa) as dados:
+                    for inicio in range(0, tamanho or 1, TXT_BLOCO_BYTES):
+                        ultimo = inicio + TXT_BLOCO_BYTES >= tamanho
+                        bloco = retorno + decodificador.decode(dados[inicio:inicio + TXT_BLOCO_BYTES], final=ultimo)
+                        decodificado = min(tamanho, inicio + TXT_BLOCO_BYTES) // mmap.PAGESIZE * mmap.PAGESIZE
+                        if hasattr(mmap, "MADV_DONTNEED") and decodificado > liberado:
+                            # Devolve as páginas já decodificadas: sem isso elas continuam contando na memória do processo
+                            mapa.madvise(mmap.MADV_DONTNEED, liberado, decodificado - liberado)
+                            liberado = decodificado
+                        if '\ufffd' in bloco and not avisou_invalidos:
+                            avisou_invalidos = True
+                            print(f"Aviso: '{os.path.basename(caminho_do_arquivo)}' tem bytes que não são UTF-8 válido; "
+                                  f"eles foram substituídos.")
+                        retorno = ""
+                        if not ultimo and bloco.endswith('\r'):
+                            bloco, retorno = bloco[:-1], '\r' # Pode ser a metade de um \r\n: fica para o próximo bloco
+                        if '\r' in bloco:
+                            bloco = bloco.replace('\r\n', '\n').replace('\r', '\n')
+                        # Procura separações só a partir da última quebra de linha do resto (o que vem antes já foi examinado)
+                        busca = resto.rfind('\n')
+                        if busca < 0:
+                            busca = len(resto)
+                        texto = resto + bloco
+                        paragrafos = []
+                        posicao = 0
+                        for separacao in _RE_LINHAS_EM_BRANCO.finditer(texto, busca):
+                            paragrafos.append(texto[posicao:separacao.start()])
+                            posicao = separacao.end()
+                        resto = texto[posicao:]
+                        while len(resto) > TXT_PARAGRAFO_MAXIMO:
+                            corte = max(resto.rfind(' ', 0, TXT_PARAGRAFO_MAXIMO), resto.rfind('\n', 0, TXT_PARAGRAFO_MAXIMO))
+                            corte = corte if corte > 0 else TXT_PARAGRAFO_MAXIMO
+                            paragrafos.append(resto[:corte])
+                            resto = resto[corte:]
+                        if ultimo:
+                            paragrafos.append(resto)
+                        for paragrafo in paragrafos:
+                            paragrafo = paragrafo.strip()
+                            if not paragrafo:
+                                continue
+                            if cancelar is not None and cancelar.is_set():
+                                return
+                            n += 1
+                            if progresso and n % 200 == 0:
+                                progresso("Lendo TXT", n, 0)
+                            yield paragrafo
+            finally:
+                if tamanho:
+                    mapa.close()
+    except FileNotFoundError:
+        raise ErroLeituraArquivo("Erro de Arquivo", f"O arquivo não foi encontrado:\n{caminho_do_arquivo}")
+    except Exception as e:
+        raise ErroLeituraArquivo("Erro ao Ler TXT", f"Não foi possível ler o arquivo TXT:\n{e}")
 
 def ler_texto_de_txt(caminho_do_arquivo):
     """Lê o texto de um arquivo .txt e retorna uma lista de parágrafos."""
-    try:
-        with open(caminho_do_arquivo, 'r', encoding='utf-8') as arquivo:
-            full_text = arquivo.read()
-            paragraphs = [p.strip() for p in re.split(r'\n\s*\n', full_text) if p.strip()]
-            return paragraphs
-    except FileNotFoundError:
-        messagebox.showerror("Erro de Arquivo", f"O arquivo não foi encontrado:\n{caminho_do_arquivo}")
+    return list(iterar_paragrafos_txt(caminho_do_arquivo))
+
+def agrupar_paginas_contiguas(indices_paginas, tamanho_maximo=8):
+    """Agrupa índices de página ordenados em intervalos contíguos (ex: [2, 3, 4, 9] -> [(2, 4), (9, 9)])."""
+    intervalos = []
+    for i in indices_paginas:
+        if intervalos and i == intervalos[-1][1] + 1 and i - intervalos[-1][0] < tamanho_maximo:
+            intervalos[-1] = (intervalos[-1][0], i)
+        else:
+            intervalos.append((i, i))
+    return intervalos
+
+def rasterizar_paginas_pdf(caminho_do_arquivo, indices_paginas, dpi=OCR_DPI, tamanho_lote=8, grayscale=False, pasta_saida=None,
+                           tempo_limite_pagina=None):
+    """Gera (indice_pagina, imagem ou caminho do PNG) com uma chamada ao poppler por intervalo contíguo de páginas."""
+    for primeira, ultima in agrupar_paginas_contiguas(indices_paginas, tamanho_lote):
+        tempo_limite = tempo_limite_pagina * (ultima - primeira + 1) if tempo_limite_pagina else None
+        try:
+            if pasta_saida:
+                images = convert_from_path(caminho_do_arquivo, first_page=primeira+1, last_page=ultima+1, dpi=dpi,
+                                           grayscale=grayscale, output_folder=pasta_saida, paths_only=True, fmt="png",
+                                           timeout=tempo_limite)
+            else:
+                images = convert_from_path(caminho_do_arquivo, first_page=primeira+1, last_page=ultima+1, dpi=dpi, grayscale=grayscale,
+                                           timeout=tempo_limite)
+        except Exception as e:
+            print(f"Aviso: Erro ao rasterizar as páginas {primeira+1}-{ultima+1}: {e}")
+            continue
+        for deslocamento, imagem in enumerate(images):
+            yield primeira + deslocamento, imagem
+
+def _executar_sem_janela(comando, tempo_limite=None):
+    """Executa um programa externo capturando a saída, sem abrir janela de console no Windows."""
+    startupinfo = None
+    if hasattr(subprocess, 'STARTUPINFO'):
+        startupinfo = subprocess.STARTUPINFO()
+        startupinfo.dwFlags |= subprocess.STARTF_USESHOWWINDOW
+        startupinfo.wShowWindow = subprocess.SW_HIDE
+    return subprocess.run(comando, stdin=subprocess.DEVNULL, stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+                          startupinfo=startupinfo, timeout=tempo_limite)
+
+def texto_e_confianca_ocr(dados):
+    """Remonta o texto da saída do image_to_data do Tesseract e calcula a confiança média das palavras."""
+    linhas = []
+    chave_anterior = None
+    confiancas = []
+    for bloco, paragrafo, linha, confianca, palavra in zip(dados["block_num"], dados["par_num"], dados["line_num"],
+                                                          dados["conf"], dados["text"]):
+        palavra = str(palavra).strip()
+        if not palavra or float(confianca) < 0:
+            continue
+        confiancas.append(float(confianca))
+        chave = (bloco, paragrafo, linha)
+        if chave != chave_anterior:
+            if chave_anterior is not None and chave[:2] != chave_anterior[:2]:
+                linhas.append("")
+            linhas.append(palavra)
+            chave_anterior = chave
+        else:
+            linhas[-1] += " " + palavra
+    confianca_media = sum(confiancas) / len(confiancas) if confiancas else 0.0
+    return "\n".join(linhas), confianca_media
+
+def _binarizar(imagem):
+    """Converte a página para preto e branco, o que acelera o Tesseract em digitalizações limpas."""
+    return ImageOps.autocontrast(imagem.convert('L')).point(lambda p: 255 if p >= 128 else 0, mode='1')
+
+def _binarizar_arquivo(caminho_imagem):
+    """Binariza uma página gravada em disco, substituindo o arquivo (só uma página fica em memória por vez)."""
+    with Image.open(caminho_imagem) as imagem:
+        binarizada = _binarizar(imagem)
+    binarizada.save(caminho_imagem)
+    return caminho_imagem
+
+def _remover_arquivos(caminhos):
+    for caminho in caminhos:
+        try:
+            os.remove(caminho)
+        except OSError:
+            pass
+
+def ocr_em_lote(imagens, idioma=OCR_IDIOMA, tempo_limite=None):
+    """Reconhece várias imagens numa única execução do Tesseract e retorna [(texto, confiança média)]."""
+    if not imagens:
+        return []
+    with tempfile.TemporaryDirectory(prefix="leitor_ocr_") as pasta:
+        caminhos = []
+        for n, imagem in enumerate(imagens):
+            if isinstance(imagem, str):
+                caminhos.append(os.path.abspath(imagem))
+                continue
+            caminho_imagem = os.path.join(pasta, f"pagina_{n:04d}.png")
+            imagem.save(caminho_imagem)
+            caminhos.append(caminho_imagem)
+        lista = os.path.join(pasta, "lista.txt")
+        with open(lista, 'w', encoding='utf-8') as f:
+            f.write("\n".join(caminhos) + "\n")
+
+        saida = os.path.join(pasta, "saida")
+        comando = [pytesseract.pytesseract.tesseract_cmd, lista, saida, '-l', idioma, 'tsv']
+        processo = _executar_sem_janela(comando, tempo_limite)
+        if processo.returncode != 0:
+            raise pytesseract.TesseractError(processo.returncode, processo.stderr.decode('utf-8', 'replace').strip())
+        with open(saida + ".tsv", encoding='utf-8') as f:
+            linhas = f.read().splitlines()
+
+    # A coluna page_num do TSV numera as imagens da lista a partir de 1
+    dados_paginas = [{"block_num": [], "par_num": [], "line_num": [], "conf": [], "text": []} for _ in imagens]
+    colunas = linhas[0].split('\t') if linhas else []
+    for linha in linhas[1:]:
+        campos = dict(zip(colunas, linha.split('\t', len(colunas) - 1)))
+        if campos.get("level") != "5":
+            continue
+        dados = dados_paginas[int(campos["page_num"]) - 1]
+        for coluna in dados:
+            dados[coluna].append(campos.get(coluna, ""))
+    return [texto_e_confianca_ocr(dados) for dados in dados_paginas]
+
+# --- Pré-processamento das imagens para OCR ---
+# Toda a análise é feita numa cópia reduzida da página; só o giro e o recorte finais usam a imagem inteira.
+
+PREPROCESSAMENTO_LARGURA_ANALISE = 800 # Largura (px) da cópia reduzida usada para medir inclinação e margens
+PREPROCESSAMENTO_ANGULO_MAXIMO = 3.0 # Inclinação máxima procurada, em graus
+PREPROCESSAMENTO_MARGEM = 0.02 # Folga deixada em volta do bloco de texto, em fração do tamanho da página
+PREPROCESSAMENTO_DOBRA_LARGURA = 0.02 # Largura mínima da faixa vazia entre duas páginas lado a lado, em fração da largura
+PREPROCESSAMENTO_DOBRA_TINTA = 0.1 # Tinta máxima na dobra, em fração da tinta média das colunas de texto dos dois lados
+
+def _perfil_tinta(mascara, por_linha=True):
+    """Fração de tinta (0 a 1) de cada linha (ou coluna) de uma máscara em que a tinta vale 255."""
+    largura, altura = mascara.size
+    reduzida = mascara.resize((1, altura) if por_linha else (largura, 1), Image.BOX)
+    return [valor / 255 for valor in reduzida.tobytes()] # Máscara em tons de cinza (modo "L"): um byte por pixel
+
+def _angulo_inclinacao(mascara):
+    """Ângulo (graus, anti-horário) que deixa as linhas de texto horizontais, pelo perfil de projeção."""
+    def nitidez(angulo):
+        perfil = _perfil_tinta(mascara.rotate(angulo, resample=Image.NEAREST, fillcolor=0))
+        return sum((a - b) ** 2 for a, b in zip(perfil, perfil[1:]))
+
+    # Candidatos do menor desvio para o maior: em empate (página em branco) fica o menor giro
+    passos = int(PREPROCESSAMENTO_ANGULO_MAXIMO / 0.5)
+    angulo = max(sorted((n * 0.5 for n in range(-passos, passos + 1)), key=abs), key=nitidez)
+    return max(sorted((angulo + n * 0.1 for n in range(-4, 5)), key=lambda a: abs(a - angulo)), key=nitidez)
+
+def _limites_texto(perfil, tinta_minima=0.003, tinta_maxima=0.9):
+    """Primeira e última posição (exclusiva) do perfil com texto. Faixas quase pretas (bordas da digitalização) não contam."""
+    com_texto = [n for n, valor in enumerate(perfil) if tinta_minima < valor < tinta_maxima]
+    if not com_texto:
+        return None
+    return com_texto[0], com_texto[-1] + 1
+
+def _posicao_dobra(perfil):
+    """Coluna da dobra de um livro aberto digitalizado, ou None se não houver uma faixa central sem tinta."""
+    largura = len(perfil)
+    perfil = [0.0 if valor >= 0.9 else valor for valor in perfil] # Bordas pretas da digitalização não contam como texto
+    acumulado = [0.0]
+    for valor in perfil:
+        acumulado.append(acumulado[-1] + valor)
+
+    def media(a, b):
+        return (acumulado[b] - acumulado[a]) / max(1, b - a)
+
+    janela = max(1, round(largura * PREPROCESSAMENTO_DOBRA_LARGURA))
+    inicio, fim = int(largura * 0.45), int(largura * 0.55) # A dobra fica perto do meio
+    if fim - inicio <= janela:
         return None
+    esquerda = min(range(inicio, fim - janela), key=lambda x: media(x, x + janela))
+    lados = min(media(int(largura * 0.1), inicio), media(fim, int(largura * 0.9)))
+    if lados <= 0 or media(esquerda, esquerda + janela) > PREPROCESSAMENTO_DOBRA_TINTA * lados:
+        return None
+    return esquerda + janela // 2
+
+def preparar_imagem_ocr(imagem, dividir_duplas=True, rotacao=0):
+    """Endireita, separa páginas duplas e recorta uma página digitalizada. Retorna a lista de imagens."""
+    if rotacao:
+        imagem = imagem.rotate(-rotacao, expand=True) # O Tesseract informa o giro no sentido horário
+    largura, altura = imagem.size
+    escala = min(1.0, PREPROCESSAMENTO_LARGURA_ANALISE / largura)
+    reduzida = imagem.convert('L').resize((max(1, round(largura * escala)), max(1, round(altura * escala))), Image.BILINEAR)
+    mascara = ImageOps.autocontrast(reduzida).point(lambda p: 255 if p < 128 else 0)
+
+    angulo = _angulo_inclinacao(mascara)
+    if abs(angulo) >= 0.1:
+        imagem = imagem.rotate(angulo, resample=Image.BICUBIC, expand=True, fillcolor='white')
+        mascara = mascara.rotate(angulo, resample=Image.NEAREST, expand=True, fillcolor=0)
+        escala = mascara.size[0] / imagem.size[0]
+
+    largura_mascara, altura_mascara = mascara.size
+    faixas = [(0, largura_mascara)]
+    if dividir_duplas and largura_mascara > altura_mascara * 1.15:
+        dobra = _posicao_dobra(_perfil_tinta(mascara, por_linha=False)) # Livro aberto: corta na dobra, se houver
+        if dobra is not None:
+            faixas = [(0, dobra), (dobra, largura_mascara)]
+
+    paginas = []
+    margem = round(PREPROCESSAMENTO_MARGEM * altura_mascara)
+    for x0, x1 in faixas:
+        faixa = mascara.crop((x0, 0, x1, altura_mascara))
+        linhas = _limites_texto(_perfil_tinta(faixa))
+        colunas = _limites_texto(_perfil_tinta(faixa, por_linha=False))
+        if linhas is None or colunas is None:
+            caixa = (x0, 0, x1, altura_mascara) # Página em branco: só separa
+        else:
+            caixa = (max(x0, x0 + colunas[0] - margem), max(0, linhas[0] - margem),
+                     min(x1, x0 + colunas[1] + margem), min(altura_mascara, linhas[1] + margem))
+        paginas.append(imagem.crop(tuple(round(c / escala) for c in caixa)))
+    return paginas
+
+def _preparar_arquivo_ocr(caminho_imagem, opcoes_ocr):
+    """Aplica preparar_imagem_ocr a uma página gravada em disco. Retorna os caminhos das partes (a primeira substitui o arquivo)."""
+    with Image.open(caminho_imagem) as imagem:
+        partes = preparar_imagem_ocr(imagem, opcoes_ocr.get("dividir_duplas", True), opcoes_ocr.get("rotacao", 0))
+    caminhos = []
+    base, extensao = os.path.splitext(caminho_imagem)
+    for n, parte in enumerate(partes):
+        caminho_parte = caminho_imagem if n == 0 else f"{base}-{n}{extensao}"
+        parte.save(caminho_parte)
+        caminhos.append(caminho_parte)
+    return caminhos
+
+def detectar_orientacao_pdf(caminho_do_arquivo, indice_pagina):
+    """Giro (0, 90, 180 ou 270 graus, horário) que endireita as páginas, ou 0 se a detecção falhar."""
+    try:
+        for _, imagem in rasterizar_paginas_pdf(caminho_do_arquivo, [indice_pagina], dpi=OCR_DPI // 2,
+                                                tempo_limite_pagina=OCR_TEMPO_LIMITE_PAGINA):
+            return int(pytesseract.image_to_osd(imagem, output_type=pytesseract.Output.DICT,
+                                                timeout=OCR_TEMPO_LIMITE_PAGINA)["rotate"]) % 360
+    except Exception as e:
+        print(f"Aviso: Não foi possível detectar a orientação das páginas: {e}")
+    return 0
+
+def _tempo_esgotado(erro):
+    """True se `erro` indica que o Tesseract foi interrompido por passar do tempo limite."""
+    if isinstance(erro, subprocess.TimeoutExpired):
+        return True
+    # O pytesseract sinaliza o tempo esgotado com um RuntimeError simples (TesseractError é uma subclasse)
+    return isinstance(erro, RuntimeError) and not isinstance(erro, pytesseract.TesseractError) and 'timeout' in str(erro).lower()
+
+def _ocr_intervalo_pdf(caminho_do_arquivo, primeira, ultima, opcoes_ocr=None):
+    """Rasteriza um intervalo de páginas e faz OCR de cada uma. Executada nos processos do pool de OCR."""
+    opcoes = opcoes_ocr or OPCOES_OCR_PADRAO
+    if opcoes["idioma"] == "auto": # Quem chama deveria ter resolvido com detectar_idioma_pdf
+        opcoes = dict(opcoes, idioma=OCR_IDIOMA)
+
+    def preparar(paginas_arquivos, binarizar):
+        preparados = []
+        for i, caminho in paginas_arquivos:
+            caminhos = _preparar_arquivo_ocr(caminho, opcoes) if opcoes.get("preprocessar") else [caminho]
+            preparados.extend((i, _binarizar_arquivo(c) if binarizar else c) for c in caminhos)
+        return preparados
+
+    def reconhecer(paginas_arquivos):
+        """Reconhece os arquivos e retorna {indice_pagina: (texto, confiança)}, sem as páginas que estouraram o tempo."""
+        esgotadas = set()
+        partes = []
+        if opcoes["em_lote"]:
+            caminhos = [caminho for i, caminho in paginas_arquivos]
+            indices = [i for i, caminho in paginas_arquivos]
+            try:
+                partes = list(zip(indices, ocr_em_lote(caminhos, opcoes["idioma"], OCR_TEMPO_LIMITE_PAGINA * len(set(indices)))))
+            except subprocess.TimeoutExpired:
+                if len(set(indices)) > 1:
+                    # Não dá para saber qual página travou o lote: cada uma é repetida sozinha, na mesma resolução
+                    print(f"Aviso: O OCR em lote das páginas {indices[0]+1}-{indices[-1]+1} passou do tempo; "
+                          f"reconhecendo uma a uma.")
+                    reconhecidas = {}
+                    for i in sorted(set(indices)):
+                        reconhecidas.update(reconhecer([(j, caminho) for j, caminho in paginas_arquivos if j == i]))
+                    return reconhecidas
+                esgotadas.update(indices)
+            finally:
+                _remover_arquivos(caminhos)
+        else:
+            for i, caminho in paginas_arquivos:
+                try:
+                    if i in esgotadas:
+                        continue
+                    dados = pytesseract.image_to_data(caminho, lang=opcoes["idioma"], output_type=pytesseract.Output.DICT,
+                                                      timeout=OCR_TEMPO_LIMITE_PAGINA)
+                except RuntimeError as e:
+                    if not _tempo_esgotado(e):
+                        raise
+                    esgotadas.add(i)
+                    continue
+                finally:
+                    _remover_arquivos([caminho])
+                partes.append((i, texto_e_confianca_ocr(dados)))
+        por_pagina = {}
+        for i, parte in partes:
+            if i not in esgotadas:
+                por_pagina.setdefault(i, []).append(parte)
+        return {i: ("\n\n".join(texto for texto, _ in lista), sum(confianca for _, confianca in lista) / len(lista))
+                for i, lista in por_pagina.items()}
+
+    def etapa(paginas, dpi, binarizar):
+        """OCR das `paginas` em `dpi`. Retorna ({indice_pagina: (texto, confiança)}, páginas que não ficaram prontas a tempo)."""
+        arquivos = preparar(rasterizar_paginas_pdf(caminho_do_arquivo, paginas, dpi=dpi, tamanho_lote=len(paginas),
+                                                   grayscale=binarizar, pasta_saida=spool,
+                                                   tempo_limite_pagina=OCR_TEMPO_LIMITE_PAGINA),
+                            binarizar)
+        reconhecidas = reconhecer(arquivos)
+        return reconhecidas, [i for i in paginas if i not in reconhecidas]
+
+    paginas = list(range(primeira, ultima + 1))
+    resultados = []
+    repetir = {} # Página -> resolução em que estourou o tempo
+    with tempfile.TemporaryDirectory(prefix="leitor_paginas_") as spool:
+        if opcoes["dois_niveis"]:
+            reconhecidas, atrasadas = etapa(paginas, opcoes["dpi_rapido"], binarizar=True)
+            repetir.update((i, opcoes["dpi_rapido"]) for i in atrasadas)
+            resultados.extend((i, texto, opcoes["dpi_rapido"]) for i, (texto, confianca) in reconhecidas.items()
+                              if confianca >= opcoes["confianca_minima"])
+            paginas = sorted(i for i, (texto, confianca) in reconhecidas.items() if confianca < opcoes["confianca_minima"])
+
+        if paginas:
+            reconhecidas, atrasadas = etapa(paginas, opcoes["dpi_alto"], binarizar=False)
+            repetir.update((i, opcoes["dpi_alto"]) for i in atrasadas)
+            resultados.extend((i, texto, opcoes["dpi_alto"]) for i, (texto, confianca) in reconhecidas.items())
+
+        for i, dpi in sorted(repetir.items()):
+            dpi_repeticao = max(OCR_DPI_MINIMO_REPETICAO, dpi // 2)
+            print(f"Aviso: O OCR da página {i+1} a {dpi} DPI passou de {OCR_TEMPO_LIMITE_PAGINA} s; repetindo a {dpi_repeticao} DPI.")
+            reconhecidas, atrasadas = etapa([i], dpi_repeticao, binarizar=False)
+            if atrasadas:
+                print(f"Aviso: OCR da página {i+1} abandonado; será usada a camada de texto da página.")
+            else:
+                resultados.append((i, reconhecidas[i][0], dpi_repeticao))
+    return sorted(resultados)
+
+def _multiplicar_matrizes(m1, m2):
+    """Produto de duas matrizes de transformação do PDF no formato [a b c d e f]."""
+    a1, b1, c1, d1, e1, f1 = m1
+    a2, b2, c2, d2, e2, f2 = m2
+    return (a1*a2 + b1*c2, a1*b2 + b1*d2,
+            c1*a2 + d1*c2, c1*b2 + d1*d2,
+            e1*a2 + f1*c2 + e2, e1*b2 + f1*d2 + f2)
+
+def _xobjects(recursos):
+    recursos = recursos.get_object() if recursos is not None else None
+    if not recursos or '/XObject' not in recursos:
+        return {}
+    return recursos['/XObject'].get_object()
+
+def _tem_imagens(recursos, profundidade=0):
+    """Verifica, só pelos recursos (sem interpretar o conteúdo), se a página pode desenhar alguma imagem."""
+    for xobj in _xobjects(recursos).values():
+        xobj = xobj.get_object()
+        if xobj.get('/Subtype') == '/Image':
+            return True
+        if xobj.get('/Subtype') == '/Form' and profundidade < 3 and _tem_imagens(xobj.get('/Resources'), profundidade + 1):
+            return True
+    return False
+
+def _area_imagens(operacoes, recursos, reader, ctm, profundidade=0):
+    """Soma a área (em pontos²) das imagens desenhadas por uma lista de operações do content stream."""
+    xobjects = _xobjects(recursos)
+    pilha = []
+    area = 0.0
+    for operandos, operador in operacoes:
+        if operador == b'q':
+            pilha.append(ctm)
+        elif operador == b'Q':
+            ctm = pilha.pop() if pilha else ctm
+        elif operador == b'cm':
+            ctm = _multiplicar_matrizes([float(x) for x in operandos], ctm)
+        elif operador == b'INLINE IMAGE':
+            area += abs(ctm[0] * ctm[3] - ctm[1] * ctm[2])
+        elif operador == b'Do' and operandos and operandos[0] in xobjects:
+            xobj = xobjects[operandos[0]].get_object()
+            if xobj.get('/Subtype') == '/Image':
+                # Uma imagem ocupa o quadrado unitário transformado pela CTM
+                area += abs(ctm[0] * ctm[3] - ctm[1] * ctm[2])
+            elif xobj.get('/Subtype') == '/Form' and profundidade < 3:
+                matriz = [float(x) for x in xobj.get('/Matrix', [1, 0, 0, 1, 0, 0])]
+                conteudo = PyPDF2.generic.ContentStream(xobj, reader)
+                area += _area_imagens(conteudo.operations, xobj.get('/Resources', recursos), reader,
+                                      _multiplicar_matrizes(matriz, ctm), profundidade + 1)
+    return area
+
+def classificar_pagina_pdf(page, page_text):
+    """Classifica uma página de PDF como "texto", "digitalizada" (precisa de OCR) ou "curta"."""
+    caracteres = len(page_text.strip())
+    caixa = page.mediabox
+    area_pagina = abs(float(caixa.width) * float(caixa.height)) or 1.0
+    if caracteres / (area_pagina / (72 * 72)) >= OCR_DENSIDADE_MINIMA:
+        return "texto"
+
+    recursos = page.get('/Resources')
+    if caracteres >= 50 and not _tem_imagens(recursos):
+        return "texto"
+    # Com pouco texto o conteúdo é sempre analisado: imagens embutidas (BI/ID/EI) não aparecem nos recursos
+
+    try:
+        conteudo = page.get_contents()
+        operacoes = PyPDF2.generic.ContentStream(conteudo, page.pdf).operations if conteudo is not None else []
+        cobertura = _area_imagens(operacoes, recursos, page.pdf, (1, 0, 0, 1, 0, 0)) / area_pagina
     except Exception as e:
-        messagebox.showerror("Erro ao Ler TXT", f"Não foi possível ler o arquivo TXT:\n{e}")
+        # Sem conseguir medir as imagens, volta ao critério antigo
+        print(f"Aviso: Não foi possível analisar as imagens da página: {e}")
+        cobertura = 1.0 if caracteres < 50 else 0.0
+
+    if cobertura >= OCR_COBERTURA_MINIMA:
+        return "digitalizada"
+    return "curta" if caracteres < 50 else "texto"
+
+def descrever_opcoes_ocr(opcoes_ocr):
+    """Resumo das opções que afetam o resultado do OCR, usado nas chaves de cache."""
+    if opcoes_ocr["dois_niveis"]:
+        resolucao = f"{opcoes_ocr['dpi_rapido']}-{opcoes_ocr['dpi_alto']}dpi-c{opcoes_ocr['confianca_minima']}"
+    else:
+        resolucao = f"{opcoes_ocr['dpi_alto']}dpi"
+    if opcoes_ocr.get("preprocessar"):
+        resolucao += "-ppd2" if opcoes_ocr.get("dividir_duplas") else "-pp" # d2: só corta com a dobra detectada
+    return f"{resolucao}-{opcoes_ocr['idioma']}"
+
+def chave_cache_ocr(impressao_digital, indice_pagina, opcoes_ocr):
+    return f"{impressao_digital}-p{indice_pagina + 1}-{descrever_opcoes_ocr(opcoes_ocr)}"
+
+# Extratores da camada de texto de PDFs. Todos recebem (caminho, reader do PyPDF2, primeira, ultima)
+# e retornam a lista com o texto de cada página do intervalo (índices a partir de 0, inclusivos).
+
+def _texto_pdf_pypdf2(caminho_do_arquivo, reader, primeira, ultima):
+    return [reader.pages[i].extract_text() or "" for i in range(primeira, ultima + 1)]
+
+def _texto_pdf_pdftotext(caminho_do_arquivo, reader, primeira, ultima):
+    comando = [shutil.which("pdftotext"), '-f', str(primeira + 1), '-l', str(ultima + 1), '-enc', 'UTF-8', '-q',
+               caminho_do_arquivo, '-']
+    processo = _executar_sem_janela(comando)
+    if processo.returncode != 0:
+        raise RuntimeError(f"pdftotext terminou com código {processo.returncode}: "
+                           f"{processo.stderr.decode('utf-8', 'replace').strip()}")
+    # O pdftotext termina cada página com um caractere de quebra de página (\f)
+    textos = processo.stdout.decode('utf-8', 'replace').split('\f')[:ultima - primeira + 1]
+    return textos + [""] * (ultima - primeira + 1 - len(textos))
+
+def _texto_pdf_pymupdf(caminho_do_arquivo, reader, primeira, ultima):
+    with fitz.open(caminho_do_arquivo) as documento:
+        return [documento[i].get_text() for i in range(primeira, ultima + 1)]
+
+EXTRATORES_TEXTO_PDF = {
+    "pypdf2": _texto_pdf_pypdf2,
+    "pdftotext": _texto_pdf_pdftotext,
+    "pymupdf": _texto_pdf_pymupdf,
+}
+
+def extratores_texto_pdf_disponiveis():
+    """Nomes dos extratores de EXTRATORES_TEXTO_PDF que podem ser usados nesta máquina."""
+    disponiveis = ["pypdf2"]
+    if shutil.which("pdftotext"):
+        disponiveis.append("pdftotext")
+    if fitz is not None:
+        disponiveis.append("pymupdf")
+    return disponiveis
+
+def _caracteres_uteis(textos):
+    """Conta letras e dígitos, descontando marcas típicas de extração com defeito (caracteres de substituição, '(cid:N)')."""
+    texto = "".join(textos)
+    defeitos = texto.count('\ufffd') + 10 * texto.count('(cid:')
+    return sum(c.isalnum() for c in texto) - 10 * defeitos
+
+def calibrar_extrator_texto_pdf(caminho_do_arquivo, reader, num_paginas=PDF_PAGINAS_CALIBRACAO):
+    """Escolhe o extrator mais rápido com texto aceitável. Retorna o nome e os textos das páginas medidas."""
+    ultima = min(num_paginas, len(reader.pages)) - 1
+    if ultima < 0:
+        return "pypdf2", []
+    medicoes = {}
+    for nome in extratores_texto_pdf_disponiveis():
+        inicio = time.perf_counter()
+        try:
+            textos = EXTRATORES_TEXTO_PDF[nome](caminho_do_arquivo, reader, 0, ultima)
+        except Exception as e:
+            print(f"Aviso: Extrator de texto '{nome}' falhou: {e}")
+            continue
+        medicoes[nome] = (time.perf_counter() - inicio, _caracteres_uteis(textos), textos)
+    if not medicoes:
+        return "pypdf2", []
+
+    melhor_qualidade = max(qualidade for duracao, qualidade, textos in medicoes.values())
+    aceitaveis = [nome for nome, (duracao, qualidade, textos) in medicoes.items() if qualidade >= 0.9 * melhor_qualidade]
+    escolhido = min(aceitaveis, key=lambda nome: medicoes[nome][0])
+    print(f"Extratores de texto ({ultima + 1} páginas): " +
+          ", ".join(f"{nome} {duracao * 1000:.0f} ms/{qualidade} caracteres" for nome, (duracao, qualidade, textos) in medicoes.items()) +
+          f" -> {escolhido}")
+    return escolhido, medicoes[escolhido][2]
+
+def _extrair_bloco_texto_pdf(caminho_do_arquivo, reader, extrator, primeira, ultima):
+    try:
+        return EXTRATORES_TEXTO_PDF[extrator](caminho_do_arquivo, reader, primeira, ultima)
+    except Exception as e:
+        print(f"Aviso: Extrator de texto '{extrator}' falhou nas páginas {primeira+1}-{ultima+1}: {e}")
+        return _texto_pdf_pypdf2(caminho_do_arquivo, reader, primeira, ultima)
+
+def _extrair_intervalo_texto_pdf(caminho_do_arquivo, extrator, primeira, ultima):
+    """Extrai a camada de texto de um intervalo de páginas abrindo o PDF por conta própria. Executada nos processos do pool."""
+    with open(caminho_do_arquivo, 'rb') as arquivo_pdf:
+        reader = PyPDF2.PdfReader(arquivo_pdf)
+        return _extrair_bloco_texto_pdf(caminho_do_arquivo, reader, extrator, primeira, ultima)
+
+def iterar_textos_camada_pdf(caminho_do_arquivo, reader, extrator="auto", num_processos=1, inicio=0, executor=None):
+    """Gera o texto da camada de texto de cada página a partir de `inicio`, em blocos de páginas."""
+    num_pages = len(reader.pages)
+    if extrator == "auto":
+        extrator, textos_iniciais = calibrar_extrator_texto_pdf(caminho_do_arquivo, reader)
+    else:
+        if extrator not in extratores_texto_pdf_disponiveis():
+            print(f"Aviso: Extrator de texto '{extrator}' indisponível, usando o PyPDF2.")
+            extrator = "pypdf2"
+        textos_iniciais = []
+    yield from textos_iniciais[inicio:]
+
+    blocos = [(primeira, min(primeira + PDF_PAGINAS_POR_BLOCO, num_pages) - 1)
+              for primeira in range(max(len(textos_iniciais), inicio), num_pages, PDF_PAGINAS_POR_BLOCO)]
+    if num_processos <= 1 or num_pages < PDF_PAGINAS_MINIMO_PARALELO:
+        for primeira, ultima in blocos:
+            yield from _extrair_bloco_texto_pdf(caminho_do_arquivo, reader, extrator, primeira, ultima)
+        return
+
+    # Mantém só alguns blocos em andamento à frente do que já foi entregue, para não extrair o livro todo
+    # se o carregamento for cancelado logo no começo.
+    pool_proprio = executor is None
+    if pool_proprio:
+        executor = concurrent.futures.ProcessPoolExecutor(max_workers=num_processos)
+    em_andamento = collections.deque()
+    try:
+        proximos = iter(blocos)
+        for primeira, ultima in proximos:
+            em_andamento.append(executor.submit(_extrair_intervalo_texto_pdf, caminho_do_arquivo, extrator, primeira, ultima))
+            if len(em_andamento) >= 2 * num_processos:
+                break
+        while em_andamento:
+            textos = em_andamento.popleft().result()
+            for primeira, ultima in proximos:
+                em_andamento.append(executor.submit(_extrair_intervalo_texto_pdf, caminho_do_arquivo, extrator, primeira, ultima))
+                break
+            yield from textos
+    finally:
+        if pool_proprio:
+            executor.shutdown(wait=False, cancel_futures=True)
+        else:
+            for futuro in em_andamento:
+                futuro.cancel()
+
+# Estratégias de leitura de um PDF inteiro: "texto" (só a camada de texto, sem analisar imagens),
+# "ocr" (todas as páginas vão para o OCR, sem extrair a camada de texto) e "hibrida" (decide página a página).
+ESTRATEGIAS_PDF = ("texto", "ocr", "hibrida")
+
+def pre_analisar_pdf(caminho_do_arquivo, reader, num_amostras=PDF_PAGINAS_PRE_ANALISE):
+    """Classifica o documento por uma amostra de páginas e escolhe a estratégia de leitura."""
+    num_pages = len(reader.pages)
+    if num_pages <= num_amostras:
+        amostra = list(range(num_pages))
+    else:
+        amostra = sorted({round(n * (num_pages - 1) / (num_amostras - 1)) for n in range(num_amostras)})
+
+    classes = collections.Counter()
+    textos = []
+    tempo_extracao = tempo_classificacao = 0.0
+    for i in amostra:
+        inicio = time.perf_counter()
+        page_text = reader.pages[i].extract_text() or ""
+        textos.append(page_text)
+        meio = time.perf_counter()
+        classes[classificar_pagina_pdf(reader.pages[i], page_text)] += 1
+        tempo_extracao += meio - inicio
+        tempo_classificacao += time.perf_counter() - meio
+
+    if classes["digitalizada"] == 0:
+        tipo, estrategia = "digital", "texto"
+    elif classes["digitalizada"] == len(amostra):
+        tipo, estrategia = "escaneado", "ocr"
+    else:
+        tipo, estrategia = "misto", "hibrida"
+    return {"tipo": tipo, "estrategia": estrategia, "amostras": len(amostra), "classes": dict(classes),
+            "texto_amostra": "\n".join(textos), "tempo_extracao": tempo_extracao, "tempo_classificacao": tempo_classificacao}
+
+# --- Idioma do OCR ---
+# Palavras muito frequentes de cada idioma (códigos do Tesseract). Contá-las num trecho de texto basta para
+# reconhecer o idioma; as palavras em comum entre dois idiomas não ajudam a separá-los e são descontadas.
+PALAVRAS_FREQUENTES_IDIOMAS = {
+    "por": {"de", "que", "não", "uma", "os", "do", "da", "em", "para", "com", "as", "dos", "das", "ao", "mais", "mas",
+            "foi", "ele", "ela", "isso", "seu", "sua", "como", "também", "quando", "muito", "são", "está", "pelo", "pela"},
+    "eng": {"the", "and", "of", "to", "in", "is", "that", "it", "was", "for", "with", "as", "his", "on", "be", "at",
+            "by", "this", "had", "not", "are", "but", "from", "have", "they", "which", "you", "were", "her", "would"},
+    "spa": {"de", "la", "que", "el", "en", "los", "del", "las", "por", "con", "una", "para", "es", "al", "lo", "como",
+            "más", "pero", "sus", "le", "ya", "fue", "este", "ha", "muy", "también", "está", "cuando", "hay", "yo"},
+    "fra": {"de", "la", "le", "et", "les", "des", "en", "du", "une", "est", "que", "dans", "qui", "pour", "pas", "au",
+            "sur", "il", "ne", "se", "ce", "avec", "plus", "par", "mais", "sont", "été", "nous", "elle", "était"},
+    "deu": {"der", "die", "und", "in", "den", "von", "zu", "das", "mit", "sich", "des", "auf", "für", "ist", "im", "dem",
+            "nicht", "ein", "eine", "als", "auch", "es", "an", "werden", "aus", "er", "hat", "dass", "sie", "wurde"},
+    "ita": {"di", "che", "il", "la", "e", "per", "un", "non", "in", "una", "sono", "del", "della", "le", "si", "con",
+            "da", "al", "gli", "ma", "come", "anche", "più", "nel", "alla", "questo", "ha", "è", "era", "loro"},
+}
+IDIOMA_PALAVRAS_MINIMAS = 20 # Palavras frequentes exclusivas necessárias para confiar na detecção (e para um idioma secundário)
+IDIOMA_FRACAO_SECUNDARIO = 0.3 # Um segundo idioma só entra no conjunto com pelo menos esta fração das palavras do principal
+IDIOMA_MAXIMO = 2 # Idiomas no conjunto detectado: cada modelo a mais deixa o OCR de todas as páginas mais lento
+IDIOMA_PAGINAS_AMOSTRA = 8
+
+_idiomas_tesseract_instalados = None
+
+def idiomas_tesseract_instalados():
+    """Conjunto dos idiomas instalados no Tesseract (consultado uma vez por processo), ou None se não for possível saber."""
+    global _idiomas_tesseract_instalados
+    if _idiomas_tesseract_instalados is None:
+        try:
+            _idiomas_tesseract_instalados = set(pytesseract.get_languages(config=''))
+        except Exception as e:
+            print(f"Aviso: Não foi possível listar os idiomas do Tesseract: {e}")
+            return None
+    return _idiomas_tesseract_instalados
+
+def detectar_idioma_texto(texto):
+    """Menor conjunto de idiomas do Tesseract (ex: "por" ou "por+eng") que cobre o texto, ou None se houver pouco texto."""
+    contagem = collections.Counter(re.findall(r"[^\W\d_]+", texto.lower()))
+
+    def exclusivas(idioma, outro):
+        return sum(n for palavra, n in contagem.items()
+                   if palavra in PALAVRAS_FREQUENTES_IDIOMAS[idioma] and palavra not in PALAVRAS_FREQUENTES_IDIOMAS[outro])
+
+    def pontos(idioma):
+        return sum(n for palavra, n in contagem.items() if palavra in PALAVRAS_FREQUENTES_IDIOMAS[idioma])
+
+    principal = max(PALAVRAS_FREQUENTES_IDIOMAS, key=pontos)
+    # Entre idiomas próximos (português e espanhol), decide pelas palavras que só um dos dois tem
+    for outro in PALAVRAS_FREQUENTES_IDIOMAS:
+        if outro != principal and exclusivas(outro, principal) > exclusivas(principal, outro):
+            principal = outro
+    if min((exclusivas(principal, outro) for outro in PALAVRAS_FREQUENTES_IDIOMAS if outro != principal),
+           default=0) < IDIOMA_PALAVRAS_MINIMAS:
         return None
+    # Os outros idiomas entram um a um, contando só as palavras que os já escolhidos não cobrem
+    idiomas = [principal]
+    minimo = max(IDIOMA_PALAVRAS_MINIMAS, IDIOMA_FRACAO_SECUNDARIO * pontos(principal))
+    while len(idiomas) < IDIOMA_MAXIMO:
+        cobertas = set().union(*(PALAVRAS_FREQUENTES_IDIOMAS[idioma] for idioma in idiomas))
+
+        def novas(idioma):
+            return sum(n for palavra, n in contagem.items()
+                       if palavra in PALAVRAS_FREQUENTES_IDIOMAS[idioma] and palavra not in cobertas)
+
+        candidato = max((idioma for idioma in PALAVRAS_FREQUENTES_IDIOMAS if idioma not in idiomas), key=novas)
+        if novas(candidato) < minimo:
+            break
+        idiomas.append(candidato)
+    return "+".join(idiomas)
+
+def _manter_idiomas_instalados(idioma):
+    """Tira de `idioma` (ex: "por+eng") os idiomas que o Tesseract não tem instalados; None se não sobrar nenhum."""
+    instalados = idiomas_tesseract_instalados()
+    if idioma and instalados is not None:
+        disponiveis = [codigo for codigo in idioma.split("+") if codigo in instalados]
+        if len(disponiveis) < len(idioma.split("+")):
+            print(f"Aviso: Idioma(s) '{idioma}' detectado(s), mas nem todos estão instalados no Tesseract.")
+        idioma = "+".join(disponiveis) or None
+    return idioma
+
+def detectar_idioma_pdf(caminho_do_arquivo, reader, texto_amostra=None, dpi=OPCOES_OCR_PADRAO["dpi_rapido"]):
+    """Escolhe o(s) idioma(s) do Tesseract para um PDF, pela camada de texto ou por um OCR rápido."""
+    inicio = time.perf_counter()
+    num_pages = len(reader.pages)
+    if texto_amostra is None:
+        passo = max(1, num_pages // IDIOMA_PAGINAS_AMOSTRA)
+        texto_amostra = "\n".join(reader.pages[i].extract_text() or "" for i in range(0, num_pages, passo)[:IDIOMA_PAGINAS_AMOSTRA])
+    origem = "camada de texto"
+    idioma = detectar_idioma_texto(texto_amostra)
+    if idioma is None and num_pages:
+        origem = "OCR rápido"
+        try:
+            for _, imagem in rasterizar_paginas_pdf(caminho_do_arquivo, [num_pages // 2], dpi=dpi, grayscale=True,
+                                                    tempo_limite_pagina=OCR_TEMPO_LIMITE_PAGINA):
+                idioma = detectar_idioma_texto(pytesseract.image_to_string(imagem, lang=OCR_IDIOMA, timeout=OCR_TEMPO_LIMITE_PAGINA))
+        except Exception as e:
+            print(f"Aviso: Não foi possível detectar o idioma pelo OCR: {e}")
+
+    idioma = _manter_idiomas_instalados(idioma)
+    print(f"Idioma do OCR de '{os.path.basename(caminho_do_arquivo)}': {idioma or OCR_IDIOMA} "
+          f"({origem if idioma else 'não detectado'}, {(time.perf_counter() - inicio) * 1000:.0f} ms)")
+    return idioma or OCR_IDIOMA
+
+def ler_checkpoint_pdf(caminho_checkpoint):
+    """Lê as páginas já concluídas de um checkpoint (JSON Lines), descartando uma última linha incompleta."""
+    trechos = []
+    try:
+        with open(caminho_checkpoint, 'r', encoding='utf-8') as f:
+            for linha in f:
+                try:
+                    dados = json.loads(linha)
+                except ValueError:
+                    break
+                if dados.get("pagina") != len(trechos):
+                    break
+                trechos.append(TrechoPagina(dados["pagina"], dados["origem"], dados["texto"], dados.get("dpi")))
+    except FileNotFoundError:
+        pass
+    except OSError as e:
+        print(f"Aviso: Não foi possível ler o checkpoint '{caminho_checkpoint}': {e}")
+    return trechos
+
+def iterar_paginas_pdf(caminho_do_arquivo, num_processos=1, cancelar=None, progresso=None, avisar=None, cache_ocr=None,
+                       estatisticas=None, opcoes_ocr=None, extrator_texto="auto", estrategia="auto", checkpoint=None):
+    """Gera um TrechoPagina para cada página de um arquivo .pdf, em ordem, assim que ela fica disponível."""
+    opcoes_ocr = opcoes_ocr or OPCOES_OCR_PADRAO
+    if estatisticas is None:
+        estatisticas = {}
+    estatisticas.update(paginas=0, ocr=0, ocr_evitado=0, ocr_alta_resolucao=0, retomadas=0, estrategia=estrategia)
+    paralelo = num_processos > 1
+    impressao_digital = None
+    executor = None
+    pendentes = collections.deque() # (primeira, ultima, TrechoPagina pronto, resultado do OCR ou futuro), na ordem das páginas
+    textos_camada = {} # Texto original das páginas enviadas ao OCR, usado se o OCR falhar
+    intervalo_aberto = None
+    textos_camada_pdf = None
+    arquivo_checkpoint = None
+
+    def concluir(trecho):
+        if arquivo_checkpoint is not None:
+            arquivo_checkpoint.write(json.dumps(trecho._asdict(), ensure_ascii=False) + "\n")
+            arquivo_checkpoint.flush() # Só o que chegou ao disco é retomado depois de uma queda
+        if progresso:
+            progresso("Lendo PDF", trecho.pagina + 1, num_pages)
+        return trecho
+
+    def fechar_intervalo():
+        nonlocal executor, intervalo_aberto, opcoes_ocr
+        primeira, ultima = intervalo_aberto
+        intervalo_aberto = None
+        if opcoes_ocr.get("preprocessar") and "rotacao" not in opcoes_ocr:
+            # Orientação detectada uma única vez, na primeira página que vai para o OCR, e repassada a todos os intervalos
+            opcoes_ocr = dict(opcoes_ocr, rotacao=detectar_orientacao_pdf(caminho_do_arquivo, primeira))
+        if paralelo:
+            # Não deixa a extração correr muito à frente do OCR: no máximo OCR_LOTES_POR_PROCESSO intervalos por processo
+            while not (cancelar is not None and cancelar.is_set()):
+                em_andamento = [r for _, _, r in pendentes if isinstance(r, concurrent.futures.Future) and not r.done()]
+                if len(em_andamento) < OCR_LOTES_POR_PROCESSO * num_processos:
+                    break
+                concurrent.futures.wait(em_andamento, timeout=0.2, return_when=concurrent.futures.FIRST_COMPLETED)
+            pendentes.append((primeira, ultima, executor.submit(_ocr_intervalo_pdf, caminho_do_arquivo, primeira, ultima, opcoes_ocr)))
+        else:
+            try:
+                resultado = _ocr_intervalo_pdf(caminho_do_arquivo, primeira, ultima, opcoes_ocr)
+            except pytesseract.TesseractNotFoundError:
+                raise
+            except Exception as ocr_e:
+                print(f"Aviso: Erro ao tentar OCR nas páginas {primeira+1}-{ultima+1}: {ocr_e}")
+                resultado = []
+            pendentes.append((primeira, ultima, resultado))
+
+    def entregar_prontas(bloquear):
+        while pendentes:
+            primeira, ultima, resultado = pendentes[0]
+            if isinstance(resultado, concurrent.futures.Future):
+                if not resultado.done() and not bloquear:
+                    return
+                while not resultado.done():
+                    if cancelar is not None and cancelar.is_set():
+                        return
+                    concurrent.futures.wait([resultado], timeout=0.2)
+                try:
+                    resultado = resultado.result()
+                except Exception as ocr_e:
+                    print(f"Aviso: Erro ao tentar OCR nas páginas {primeira+1}-{ultima+1}: {ocr_e}")
+                    resultado = []
+            pendentes.popleft()
+            if isinstance(resultado, TrechoPagina):
+                yield concluir(resultado)
+                continue
+            textos_ocr = {i: (texto, dpi) for i, texto, dpi in resultado}
+            for i in range(primeira, ultima + 1):
+                texto_camada = textos_camada.pop(i, None) or ""
+                if i not in textos_ocr:
+                    if estrategia == "ocr": # A camada de texto não foi extraída: é lida agora, só para esta página
+                        try:
+                            texto_camada = reader.pages[i].extract_text() or ""
+                        except Exception as e:
+                            print(f"Aviso: Não foi possível ler a camada de texto da página {i+1}: {e}")
+                    yield concluir(TrechoPagina(i, "texto", texto_camada))
+                    continue
+                texto, dpi = textos_ocr[i]
+                if dpi == opcoes_ocr["dpi_alto"] and opcoes_ocr["dois_niveis"]:
+                    estatisticas["ocr_alta_resolucao"] += 1
+                if cache_ocr is not None:
+                    try:
+                        cache_ocr.gravar(chave_cache_ocr(impressao_digital, i, opcoes_ocr),
+                                         json.dumps({"texto": texto, "dpi": dpi}, ensure_ascii=False).encode('utf-8'))
+                    except OSError as e:
+                        print(f"Aviso: Não foi possível gravar o OCR da página {i+1} no cache: {e}")
+                yield concluir(TrechoPagina(i, "ocr", texto, dpi))
 
-def ler_texto_de_pdf(caminho_do_arquivo):
-    """Lê o texto de um arquivo .pdf, usando OCR para imagens se necessário, e retorna o texto completo como UMA ÚNICA STRING."""
-    full_text_extracted = ""
-    
     try:
         with open(caminho_do_arquivo, 'rb') as arquivo_pdf:
             reader = PyPDF2.PdfReader(arquivo_pdf)
             num_pages = len(reader.pages)
-            
-            for i in range(num_pages):
+            ocr_disponivel = os.path.exists(TESSERACT_CMD_PATH)
+            avisou_tesseract = False
+            if cache_ocr is not None:
+                impressao_digital = impressao_digital_arquivo(caminho_do_arquivo)
+
+            texto_amostra = None
+            if estrategia == "auto":
+                analise = pre_analisar_pdf(caminho_do_arquivo, reader)
+                texto_amostra = analise["texto_amostra"]
+                estrategia = analise["estrategia"]
+                print(f"Pré-análise de '{os.path.basename(caminho_do_arquivo)}': {analise['amostras']} páginas "
+                      f"(extração {analise['tempo_extracao'] * 1000:.0f} ms, análise {analise['tempo_classificacao'] * 1000:.0f} ms), "
+                      f"{analise['classes']} -> documento {analise['tipo']}, estratégia '{estrategia}'")
+            if estrategia == "ocr" and not ocr_disponivel:
+                estrategia = "hibrida" # Sem Tesseract, a camada de texto é tudo o que há
+            estatisticas["estrategia"] = estrategia
+            if opcoes_ocr["idioma"] == "auto" and estrategia != "texto" and ocr_disponivel:
+                opcoes_ocr = dict(opcoes_ocr, idioma=detectar_idioma_pdf(caminho_do_arquivo, reader, texto_amostra,
+                                                                         opcoes_ocr["dpi_rapido"]))
+
+            retomadas = []
+            if checkpoint:
+                retomadas = ler_checkpoint_pdf(checkpoint)[:num_pages]
+                os.makedirs(os.path.dirname(checkpoint), exist_ok=True)
+                # Regrava só as linhas válidas e continua acrescentando a partir delas
+                arquivo_checkpoint = open(checkpoint, 'w', encoding='utf-8')
+                if retomadas:
+                    print(f"Retomando '{os.path.basename(caminho_do_arquivo)}' do checkpoint: "
+                          f"{len(retomadas)} de {num_pages} páginas já concluídas")
+            estatisticas["paginas"] = estatisticas["retomadas"] = len(retomadas)
+            for trecho in retomadas:
+                yield concluir(trecho)
+
+            if paralelo: # Um único pool para a extração da camada de texto e o OCR (os processos só sobem no primeiro uso)
+                executor = concurrent.futures.ProcessPoolExecutor(max_workers=num_processos)
+            if estrategia != "ocr":
+                textos_camada_pdf = iterar_textos_camada_pdf(caminho_do_arquivo, reader, extrator_texto, num_processos,
+                                                             inicio=len(retomadas), executor=executor)
+            for i in range(len(retomadas), num_pages):
+                if cancelar is not None and cancelar.is_set():
+                    return
                 page = reader.pages[i]
-                page_text = page.extract_text()
-                
-                if not page_text or len(page_text.strip()) < 50: 
-                    try:
-                        if not os.path.exists(TESSERACT_CMD_PATH):
-                            messagebox.showwarning("Tesseract Não Configurado", 
-                                                   "Caminho do Tesseract OCR não configurado ou inválido. O OCR pode falhar. \n"
-                                                   "Verifique 'TESSERACT_CMD_PATH' no código.")
-                            full_text_extracted += page_text + "\n\n" 
-                            continue 
-                            
-                        images = convert_from_path(caminho_do_arquivo, first_page=i+1, last_page=i+1, dpi=300) 
-                        
-                        if images:
-                            ocr_text = pytesseract.image_to_string(images[0], lang='por+eng')
-                            full_text_extracted += ocr_text + "\n\n"
-                        else:
-                            full_text_extracted += page_text + "\n\n"
-                    except pytesseract.TesseractNotFoundError:
-                         messagebox.showerror("Erro Tesseract OCR", 
-                              f"Tesseract OCR não encontrado.\n"
-                              f"Por favor, instale o Tesseract OCR e/ou configure o caminho em 'TESSERACT_CMD_PATH' no código:\n'{TESSERACT_CMD_PATH}'")
-                         return None 
-                    except Exception as ocr_e:
-                        print(f"Aviso: Erro ao tentar OCR na página {i+1}: {ocr_e}")
-                        full_text_extracted += page_text + "\n\n" 
+                estatisticas["paginas"] += 1
+
+                if estrategia == "ocr":
+                    page_text, classe = "", "digitalizada"
+                elif estrategia == "texto":
+                    # A pré-análise só vê algumas páginas: uma página sem camada de texto ainda é examinada
+                    page_text = next(textos_camada_pdf)
+                    classe = "texto" if len(page_text.strip()) >= 50 else classificar_pagina_pdf(page, page_text)
                 else:
-                    full_text_extracted += page_text + "\n\n" 
-        
-        return full_text_extracted
-
+                    page_text = next(textos_camada_pdf)
+                    classe = classificar_pagina_pdf(page, page_text)
+                if classe == "curta" and len(page_text.strip()) < 50:
+                    estatisticas["ocr_evitado"] += 1 # Seria enviada ao OCR pelo critério antigo (< 50 caracteres)
+                elif classe == "digitalizada":
+                    estatisticas["ocr"] += 1
+
+                texto_cache = None
+                if classe == "digitalizada" and cache_ocr is not None:
+                    texto_cache = cache_ocr.ler(chave_cache_ocr(impressao_digital, i, opcoes_ocr))
+
+                if texto_cache is not None:
+                    if intervalo_aberto:
+                        fechar_intervalo()
+                    pagina_cache = json.loads(texto_cache)
+                    if pagina_cache["dpi"] == opcoes_ocr["dpi_alto"] and opcoes_ocr["dois_niveis"]:
+                        estatisticas["ocr_alta_resolucao"] += 1
+                    pendentes.append((i, i, TrechoPagina(i, "ocr", pagina_cache["texto"], pagina_cache["dpi"])))
+                elif classe == "digitalizada" and ocr_disponivel:
+                    textos_camada[i] = page_text
+                    if intervalo_aberto and intervalo_aberto[1] == i - 1 and i - intervalo_aberto[0] < OCR_PAGINAS_POR_LOTE:
+                        intervalo_aberto = (intervalo_aberto[0], i)
+                    else:
+                        if intervalo_aberto:
+                            fechar_intervalo()
+                        intervalo_aberto = (i, i)
+                else:
+                    if classe == "digitalizada" and not avisou_tesseract:
+                        avisou_tesseract = True
+                        if avisar:
+                            avisar("Tesseract Não Configurado", 
+                                   "Caminho do Tesseract OCR não configurado ou inválido. O OCR pode falhar. \n"
+                                   "Verifique 'TESSERACT_CMD_PATH' no código.")
+                    if intervalo_aberto:
+                        fechar_intervalo()
+                    pendentes.append((i, i, TrechoPagina(i, "texto", page_text)))
+
+                yield from entregar_prontas(bloquear=False)
+
+            if intervalo_aberto:
+                fechar_intervalo()
+            yield from entregar_prontas(bloquear=True)
+            if cancelar is not None and cancelar.is_set():
+                return
+            print(f"PDF '{os.path.basename(caminho_do_arquivo)}' (estratégia '{estrategia}'): {estatisticas['paginas']} páginas, "
+                  f"{estatisticas['ocr']} escaneadas (OCR, {estatisticas['ocr_alta_resolucao']} refeitas em alta resolução), "
+                  f"{estatisticas['ocr_evitado']} páginas curtas sem OCR, {estatisticas['retomadas']} retomadas do checkpoint")
+            if arquivo_checkpoint is not None:
+                arquivo_checkpoint.close()
+                arquivo_checkpoint = None
+                os.remove(checkpoint) # Documento completo: não há mais o que retomar
+
+    except pytesseract.TesseractNotFoundError:
+        raise ErroLeituraArquivo("Erro Tesseract OCR", 
+                                 f"Tesseract OCR não encontrado.\n"
+                                 f"Por favor, instale o Tesseract OCR e/ou configure o caminho em 'TESSERACT_CMD_PATH' no código:\n'{TESSERACT_CMD_PATH}'")
     except FileNotFoundError:
-        messagebox.showerror("Erro de Arquivo", f"O arquivo PDF não foi encontrado:\n{caminho_do_arquivo}")
+        raise ErroLeituraArquivo("Erro de Arquivo", f"O arquivo PDF não foi encontrado:\n{caminho_do_arquivo}")
+    except Exception as e:
+        raise ErroLeituraArquivo("Erro ao Ler PDF", f"Não foi possível ler o arquivo PDF ou processar OCR:\n{e}")
+    finally:
+        if arquivo_checkpoint is not None:
+            arquivo_checkpoint.close()
+        if textos_camada_pdf is not None:
+            textos_camada_pdf.close() # Cancela os blocos da camada de texto ainda na fila do pool
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+def ler_paginas_pdf(caminho_do_arquivo, num_processos=1, cancelar=None, progresso=None, avisar=None, extrator_texto="auto",
+                    estrategia="auto"):
+    """Lê um arquivo .pdf e retorna a lista de TrechoPagina (uma por página), ou None se o carregamento for cancelado."""
+    paginas = list(iterar_paginas_pdf(caminho_do_arquivo, num_processos, cancelar, progresso, avisar,
+                                      extrator_texto=extrator_texto, estrategia=estrategia))
+    if cancelar is not None and cancelar.is_set():
+        return None
+    return paginas
+
+def ler_texto_de_pdf(caminho_do_arquivo, num_processos=1, cancelar=None, progresso=None, avisar=None, extrator_texto="auto",
+                     estrategia="auto"):
+    """Lê o texto de um arquivo .pdf, usando OCR para imagens se necessário, e retorna o texto completo como UMA ÚNICA STRING."""
+    paginas = ler_paginas_pdf(caminho_do_arquivo, num_processos, cancelar, progresso, avisar, extrator_texto, estrategia)
+    if paginas is None:
         return None
+    return "".join(pagina.texto + "\n\n" for pagina in paginas)
+
+def ler_capitulos_pdf(reader):
+    """Lê o sumário (marcadores) de um PDF já aberto e retorna a lista de Capitulo."""
+    if '/Outlines' not in reader.trailer['/Root']:
+        return []
+    capitulos = []
+
+    def percorrer(itens, nivel):
+        for item in itens:
+            if isinstance(item, list): # Filhos da entrada anterior
+                percorrer(item, nivel + 1)
+                continue
+            try:
+                pagina = reader.get_destination_page_number(item)
+            except Exception:
+                continue
+            if pagina is not None and pagina >= 0:
+                capitulos.append(Capitulo(nivel, str(item.title).strip(), pagina))
+
+    try:
+        percorrer(reader.outline, 0)
     except Exception as e:
-        messagebox.showerror("Erro ao Ler PDF", f"Não foi possível ler o arquivo PDF ou processar OCR:\n{e}")
+        print(f"Aviso: Não foi possível ler o sumário do PDF: {e}")
+    return capitulos
+
+def iterar_trechos_documento(caminho_do_arquivo, num_processos=1, cancelar=None, progresso=None, avisar=None, cache_ocr=None,
+                             estatisticas=None, opcoes_ocr=None, extrator_texto="auto", estrategia_pdf="auto", checkpoint=None,
+                             opcoes_docx=None):
+    """Gera os trechos (TrechoPagina) de um arquivo .docx, .txt (um por parágrafo) ou .pdf (um por página), na ordem do documento."""
+    extensao = caminho_do_arquivo.lower()
+    if extensao.endswith('.docx'):
+        return iterar_trechos_docx(caminho_do_arquivo, cancelar, progresso, opcoes_docx, num_processos, cache_ocr, opcoes_ocr)
+    if extensao.endswith('.txt'):
+        return (TrechoPagina(None, "texto", p) for p in iterar_paragrafos_txt(caminho_do_arquivo, cancelar, progresso))
+    if extensao.endswith('.pdf'):
+        return iterar_paginas_pdf(caminho_do_arquivo, num_processos, cancelar, progresso, avisar, cache_ocr, estatisticas,
+                                  opcoes_ocr, extrator_texto, estrategia_pdf, checkpoint)
+    raise ErroLeituraArquivo("Formato Não Suportado", "Por favor, selecione um arquivo .txt, .docx ou .pdf.")
+
+# --- Pré-processamento do Texto ---
+
+TOKENIZADOR_VERSAO = 1 # Incremente ao mudar as regras de limpeza/tokenização (invalida o cache de documentos)
+
+def _limpar_texto(texto_bruto_extraido):
+    """Aplica as regras de limpeza ao texto bruto e o achata numa única linha de palavras."""
+    # --- PRÉ-PROCESSAMENTO ROBUSTO PARA CORRIGIR SEPARAÇÃO DE PALAVRAS E LIMPAR ---
+    
+    # 1. Substitui hifens no final de uma linha e possíveis quebras por NADA (junta palavras hifenizadas)
+    #    Ex: "esfarra-\npados" -> "esfarrapados"
+    #    Regex: um caractere alfanumérico, seguido de hífen, 0 ou mais espaços, 0 ou mais quebras de linha, 0 ou mais espaços,
+    #    seguido de outro caractere alfanumérico. Substitui tudo por \1\2 (grupo 1 e grupo 2)
+    processed_text = re.sub(r'(\w+)-\s*?\n*\s*?(\w+)', r'\1\2', texto_bruto_extraido)
+    
+    # 2. Remove hifens que estão no meio da palavra ou no final, sem quebra de linha.
+    #    Isso lida com "pr-epudável" -> "preprudável" ou "palavra-" -> "palavra" se não for quebra de linha.
+    #    Vamos focar em hifens que conectam partes de palavras e não são hifens gramaticais.
+    #    Um hífen entre duas letras é um candidato.
+    processed_text = re.sub(r'([a-zA-Záéíóúçãõâêôàüñ])-([a-zA-Záéíóúçãõâêôàüñ])', r'\1\2', processed_text)
+    
+    # 3. Substitui TODAS as quebras de linha (que não foram tratadas acima) por um único espaço.
+    #    Isso "achata" todo o documento em uma única linha lógica de palavras.
+    processed_text = processed_text.replace('\n', ' ')
+    
+    # 4. Remove referências de rodapé como "" ou "[X]" que aparecem em PDFs (se o OCR as pega).
+    processed_text = re.sub(r'\|\[\d+\]', '', processed_text)
+    
+    # 5. Normaliza múltiplos espaços para um único espaço e remove espaços do início/fim.
+    return re.sub(r'\s+', ' ', processed_text).strip()
+
+def _inicio_cauda(texto):
+    """Posição a partir da qual o texto ainda pode ser afetado pelo próximo trecho (palavras hifenizadas)."""
+    m = re.search(r'\S+\s*$', texto)
+    if not m:
+        return len(texto)
+    inicio = m.start()
+    while True:
+        antes = texto[:inicio].rstrip()
+        if len(antes) >= 2 and antes[-1] == '-' and re.match(r'\w', antes[-2]):
+            inicio = re.search(r'\S+$', antes).start()
+        else:
+            return inicio
+
+class TokenizadorIncremental:
+    """Transforma texto bruto em palavras e inícios de parágrafo, trecho a trecho, como preprocessar_texto."""
+    def __init__(self):
+        self.cauda = "" # Final do texto ainda não processado (pode se juntar ao próximo trecho)
+        self.total_palavras = 0
+        self.ultima_palavra = None
+        self.indice_pendente = None # Início de parágrafo na última palavra emitida, ainda não confirmado
+
+    def alimentar(self, texto):
+        texto = self.cauda + texto
+        corte = _inicio_cauda(texto)
+        self.cauda = texto[corte:]
+        return self._emitir(re.findall(r'\S+', _limpar_texto(texto[:corte])), final=False)
+
+    def posicao_atual(self):
+        """Índice que a próxima palavra alimentada terá (contando as palavras ainda retidas na cauda)."""
+        return self.total_palavras + len(re.findall(r'\S+', _limpar_texto(self.cauda)))
+
+    def finalizar(self):
+        texto, self.cauda = self.cauda, ""
+        return self._emitir(re.findall(r'\S+', _limpar_texto(texto)), final=True)
+
+    def _emitir(self, palavras, final):
+        novos_indices = []
+        if palavras and self.indice_pendente is not None:
+            novos_indices.append(self.indice_pendente)
+            self.indice_pendente = None
+
+        for palavra in palavras:
+            # Heurística: começa um novo parágrafo após uma palavra terminada em ., ! ou ?, desde que
+            # a palavra seguinte não seja só pontuação nem um número (ex: "1. Capítulo").
+            if self.total_palavras == 0 or (re.search(r'[.!?]$', self.ultima_palavra)
+                                            and not re.match(r'^[.,!?;:]+$', palavra) and not palavra.isdigit()):
+                novos_indices.append(self.total_palavras)
+            self.ultima_palavra = palavra
+            self.total_palavras += 1
+
+        # Um início de parágrafo na última palavra do documento é redundante, então ele
+        # só é entregue quando chegar mais texto depois dela.
+        if novos_indices and novos_indices[-1] != 0 and novos_indices[-1] == self.total_palavras - 1:
+            self.indice_pendente = novos_indices.pop()
+        if final:
+            self.indice_pendente = None
+        return palavras, novos_indices
+
+def preprocessar_texto(texto_bruto_extraido):
+    """Limpa o texto bruto extraído e o divide em palavras. Retorna (palavras, paragraph_start_indices)."""
+    tokenizador = TokenizadorIncremental()
+    palavras, paragraph_start_indices = tokenizador.alimentar(texto_bruto_extraido)
+    palavras_finais, indices_finais = tokenizador.finalizar()
+    return palavras + palavras_finais, (paragraph_start_indices + indices_finais) or [0]
+
+# --- Cabeçalhos, Rodapés e Números de Página (PDF) ---
+# Só as primeiras e últimas linhas de cada página são examinadas, e cada uma custa uma consulta a um dicionário:
+# o custo total é linear no número de páginas, mesmo em documentos com milhares delas.
+
+CABECALHO_LINHAS_EXAMINADAS = 2 # Linhas não vazias do topo e do fim de cada página candidatas a cabeçalho/rodapé
+CABECALHO_DISTANCIA_MAXIMA = 2 # Páginas entre duas ocorrências de um cabeçalho (alternados em páginas pares/ímpares)
+CABECALHO_REPETICOES_MINIMAS = 2 # Repetições próximas para uma linha ser considerada cabeçalho/rodapé
+CABECALHO_VERSAO = 2 # Incremente ao mudar as regras de remoção (invalida o cache de documentos PDF)
+CABECALHO_PAGINAS_ADIANTE = CABECALHO_DISTANCIA_MAXIMA # Páginas observadas depois de uma página antes de entregá-la
+
+# Número de página sozinho na linha: algarismos ou um numeral romano bem formado, todo em maiúsculas ou todo em minúsculas
+_ROMANO = r'(?=[MDCLXVI])M{0,3}(?:CM|CD|D?C{0,3})(?:XC|XL|L?X{0,3})(?:IX|IV|V?I{0,3})'
+_ENFEITES_NUMERO = r'[\s\-–—.·•|()\[\]]*'
+_RE_NUMERO_PAGINA = re.compile(rf'^{_ENFEITES_NUMERO}(?:(?i:p[áa]g(?:ina)?)\.?\s*)?(\d{{1,4}}|{_ROMANO}|{_ROMANO.lower()})'
+                               rf'(?:\s*(?i:de|/)\s*\d{{1,4}})?{_ENFEITES_NUMERO}$')
+_VALOR_ROMANO = {"i": 1, "v": 5, "x": 10, "l": 50, "c": 100, "d": 500, "m": 1000}
+
+def _numero_pagina(linha):
+    """Valor do número de página que ocupa a linha sozinho, ou None."""
+    encontrado = _RE_NUMERO_PAGINA.match(linha.strip())
+    if not encontrado:
         return None
+    numero = encontrado.group(1).lower()
+    if numero.isdigit():
+        return int(numero)
+    valores = [_VALOR_ROMANO[letra] for letra in numero]
+    return sum(-v if v < seguinte else v for v, seguinte in zip(valores, valores[1:] + [0]))
+
+def _normalizar_linha_cabecalho(linha):
+    """Números variam de página para página ("O SENHOR DOS ANÉIS 127"), então viram '#' na comparação."""
+    return re.sub(r'\d+', '#', " ".join(linha.lower().split()))
+
+class DetectorCabecalhos:
+    """Reconhece cabeçalhos, rodapés e números de página que se repetem em páginas próximas."""
+
+    def __init__(self):
+        self.ultima_pagina = {} # chave -> última página em que a linha apareceu
+        self.repeticoes = collections.Counter() # chave -> ocorrências próximas da anterior
+        self.numeros = collections.defaultdict(set) # (posição, página) -> números de página sozinhos na linha
+        self.linhas_removidas = 0
+
+    def _candidatas(self, linhas):
+        """(índice da linha, chave) das linhas do topo e do fim da página."""
+        nao_vazias = [n for n, linha in enumerate(linhas) if linha.strip()]
+        topo = nao_vazias[:CABECALHO_LINHAS_EXAMINADAS]
+        fim = [n for n in nao_vazias[-CABECALHO_LINHAS_EXAMINADAS:] if n not in topo]
+        return ([(n, ("topo", _normalizar_linha_cabecalho(linhas[n]))) for n in topo] +
+                [(n, ("fim", _normalizar_linha_cabecalho(linhas[n]))) for n in fim])
+
+    def observar(self, texto, pagina):
+        """Registra as linhas candidatas de uma página (as páginas podem chegar fora de ordem)."""
+        linhas = texto.split("\n")
+        for n, chave in set(self._candidatas(linhas)):
+            numero = _numero_pagina(linhas[n])
+            if numero is not None:
+                self.numeros[(chave[0], pagina)].add(numero)
+            anterior = self.ultima_pagina.get(chave)
+            if anterior is not None and 0 < abs(pagina - anterior) <= CABECALHO_DISTANCIA_MAXIMA:
+                self.repeticoes[chave] += 1
+            self.ultima_pagina[chave] = pagina
+
+    def _numero_confirmado(self, linha, posicao, pagina):
+        numero = _numero_pagina(linha)
+        return numero is not None and any(
+            numero + distancia in self.numeros.get((posicao, pagina + distancia), ())
+            for distancia in range(-CABECALHO_DISTANCIA_MAXIMA, CABECALHO_DISTANCIA_MAXIMA + 1) if distancia)
+
+    def limpar(self, texto, pagina):
+        """Remove da página os cabeçalhos/rodapés e os números de página reconhecidos até agora."""
+        linhas = texto.split("\n")
+        remover = {n for n, chave in self._candidatas(linhas)
+                   if self.repeticoes[chave] >= CABECALHO_REPETICOES_MINIMAS
+                   or self._numero_confirmado(linhas[n], chave[0], pagina)}
+        if not remover:
+            return texto
+        self.linhas_removidas += len(remover)
+        return "\n".join(linha for n, linha in enumerate(linhas) if n not in remover)
+
+def remover_cabecalhos_e_rodapes(trechos, detector=None):
+    """Filtra um fluxo de TrechoPagina, tirando cabeçalhos, rodapés e números de página das páginas de PDF."""
+    detector = detector or DetectorCabecalhos()
+    retidas = collections.deque()
+    for trecho in trechos:
+        if trecho.pagina is None:
+            yield trecho
+            continue
+        detector.observar(trecho.texto, trecho.pagina)
+        retidas.append(trecho)
+        if len(retidas) > CABECALHO_PAGINAS_ADIANTE:
+            retida = retidas.popleft()
+            yield retida._replace(texto=detector.limpar(retida.texto, retida.pagina))
+    for retida in retidas:
+        yield retida._replace(texto=detector.limpar(retida.texto, retida.pagina))
+
+# --- Cache em Disco ---
+
+def impressao_digital_arquivo(caminho_do_arquivo, tamanho_amostra=64 * 1024):
+    """Identifica rapidamente o conteúdo de um arquivo pelo tamanho, data de modificação e hash do início e do fim."""
+    info = os.stat(caminho_do_arquivo)
+    h = hashlib.blake2b(digest_size=16)
+    h.update(f"{info.st_size}:{info.st_mtime_ns}".encode())
+    with open(caminho_do_arquivo, 'rb') as arquivo:
+        h.update(arquivo.read(tamanho_amostra))
+        if info.st_size > tamanho_amostra:
+            arquivo.seek(max(tamanho_amostra, info.st_size - tamanho_amostra))
+            h.update(arquivo.read(tamanho_amostra))
+    return h.hexdigest()
+
+class CacheDisco:
+    """Cache em disco com tamanho máximo: cada entrada é um arquivo e as usadas há mais tempo são removidas primeiro (LRU)."""
+    def __init__(self, diretorio, limite_bytes, extensao=".json"):
+        self.diretorio = diretorio
+        self.limite_bytes = limite_bytes
+        self.extensao = extensao
+        self.bytes_ocupados = None # Calculado na primeira gravação; evita varrer o diretório a cada entrada nova
+
+    def caminho(self, chave):
+        return os.path.join(self.diretorio, chave + self.extensao)
+
+    def ler(self, chave):
+        """Retorna os bytes da entrada ou None se ela não existir."""
+        caminho = self.caminho(chave)
+        try:
+            with open(caminho, 'rb') as f:
+                dados = f.read()
+        except OSError:
+            return None
+        try:
+            os.utime(caminho) # Marca a entrada como usada recentemente
+        except OSError:
+            pass
+        return dados
+
+    def gravar(self, chave, dados):
+        """Grava a entrada. Retorna False, sem gravar, se ela sozinha for maior que o limite do cache."""
+        if len(dados) > self.limite_bytes:
+            return False
+        os.makedirs(self.diretorio, exist_ok=True)
+        caminho = self.caminho(chave)
+        temporario = f"{caminho}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(temporario, 'wb') as f:
+            f.write(dados)
+        try:
+            tamanho_anterior = os.path.getsize(caminho) # Entrada sobrescrita: o tamanho antigo sai da conta
+        except OSError:
+            tamanho_anterior = 0
+        os.replace(temporario, caminho) # Nunca deixa uma entrada gravada pela metade
+        if self.bytes_ocupados is None:
+            self.bytes_ocupados = self.informacoes()[1]
+        else:
+            self.bytes_ocupados += len(dados) - tamanho_anterior
+        if self.bytes_ocupados > self.limite_bytes:
+            self.podar(manter=caminho)
+        return True
+
+    def entradas(self):
+        """Lista (caminho, tamanho, último uso) de cada entrada do cache."""
+        entradas = []
+        try:
+            with os.scandir(self.diretorio) as it:
+                for entrada in it:
+                    if entrada.is_file() and entrada.name.endswith(self.extensao):
+                        info = entrada.stat()
+                        entradas.append((entrada.path, info.st_size, info.st_mtime))
+        except FileNotFoundError:
+            pass
+        return entradas
+
+    def informacoes(self):
+        """Retorna (quantidade de entradas, bytes ocupados)."""
+        entradas = self.entradas()
+        return len(entradas), sum(tamanho for _, tamanho, _ in entradas)
+
+    def podar(self, limite_bytes=None, manter=None):
+        """Remove as entradas usadas há mais tempo até o cache caber no limite (nunca o arquivo `manter`)."""
+        limite_bytes = self.limite_bytes if limite_bytes is None else limite_bytes
+        entradas = sorted(self.entradas(), key=lambda e: e[2])
+        total = sum(tamanho for _, tamanho, _ in entradas)
+        for caminho, tamanho, _ in entradas:
+            if total <= limite_bytes:
+                break
+            if caminho == manter:
+                continue
+            try:
+                os.remove(caminho)
+                total -= tamanho
+            except OSError:
+                pass
+        self.bytes_ocupados = total
+
+    def limpar(self):
+        self.podar(0)
+
+def chave_cache_documento(caminho_do_arquivo, opcoes_ocr=None, remover_cabecalhos=True, opcoes_docx=None,
+                          estrategia_pdf="auto", extrator_texto="auto"):
+    chave = f"{impressao_digital_arquivo(caminho_do_arquivo)}-t{TOKENIZADOR_VERSAO}"
+    if caminho_do_arquivo.lower().endswith('.pdf'):
+        # O texto de PDFs escaneados depende das opções de OCR, e o das páginas digitais do extrator e da estratégia
+        chave += f"-{estrategia_pdf}-{extrator_texto}-k{PDF_CLASSIFICACAO_VERSAO}-" + descrever_opcoes_ocr(opcoes_ocr or OPCOES_OCR_PADRAO)
+        if remover_cabecalhos:
+            chave += f"-sc{CABECALHO_VERSAO}"
+    elif caminho_do_arquivo.lower().endswith('.docx'):
+        opcoes_docx = opcoes_docx or OPCOES_DOCX_PADRAO
+        chave += f"-d{DOCX_LEITOR_VERSAO}-{descrever_opcoes_docx(opcoes_docx)}"
+        if opcoes_docx.get("imagens", True):
+            chave += "-" + descrever_opcoes_ocr(opcoes_ocr or OPCOES_OCR_PADRAO) # O texto das imagens vem do OCR
+    elif caminho_do_arquivo.lower().endswith('.txt'):
+        chave += f"-x{TXT_LEITOR_VERSAO}"
+    return chave
 
 # --- Lógica Principal da Aplicação com Tkinter ---
 
@@ -111,12 +1832,26 @@ class LeitorRapidoApp:
         self.esta_lendo = False
         self.job_id = None
         self.paragraph_start_indices = []
+        self.inicio_paginas = [] # Índice da primeira palavra de cada página (apenas PDFs)
+        self.capitulos = [] # Sumário do documento (lista de Capitulo), se houver
         self.caminho_arquivo_atual = None
+        self.cancelar_carregamento = threading.Event()
+        self.fila_carregamento = None
+        self.carregando = False # True enquanto a thread de carregamento ainda está entregando palavras
+        self.leitura_liberada = False
+        self.palavras_para_iniciar = 300 # Palavras necessárias para liberar a leitura durante o carregamento
+        # Modo sob demanda (PDFs grandes): self.palavras começa com None no lugar das palavras de cada página,
+        # na quantidade estimada, e cada página é trocada pelas palavras reais quando é extraída.
+        self.sob_demanda = False
+        self.paginas_pendentes = 0
+        self.pagina_cursor = 0 # Página da posição de leitura, consultada pela thread de pré-carregamento
+        self.pagina_predefinida = None
 
         self.program_dir = os.path.dirname(os.path.abspath(__file__))
         self.saves_dir = os.path.join(self.program_dir, "progress_saves")
         self.config_dir = os.path.join(self.program_dir, "config")
         self.settings_file = os.path.join(self.config_dir, "settings.json")
+        self.cache_dir = os.path.join(self.program_dir, "cache")
 
         os.makedirs(self.saves_dir, exist_ok=True)
         os.makedirs(self.config_dir, exist_ok=True)
@@ -126,6 +1861,30 @@ class LeitorRapidoApp:
         self.tamanho_fonte_atual = 48
         self.nome_fonte_atual = "Arial"
         self.velocidade_leitura_atual = 300
+        self.ocr_processos = 0 # 0 = automático (núcleos disponíveis - 1)
+        self.cache_limite_mb = 200
+        self.cache_ocr_limite_mb = 500
+        self.ocr_dois_niveis = OPCOES_OCR_PADRAO["dois_niveis"]
+        self.ocr_dpi_rapido = OPCOES_OCR_PADRAO["dpi_rapido"]
+        self.ocr_dpi_alto = OPCOES_OCR_PADRAO["dpi_alto"]
+        self.ocr_confianca_minima = OPCOES_OCR_PADRAO["confianca_minima"]
+        self.ocr_em_lote = OPCOES_OCR_PADRAO["em_lote"]
+        self.ocr_preprocessar = OPCOES_OCR_PADRAO["preprocessar"]
+        self.ocr_dividir_duplas = OPCOES_OCR_PADRAO["dividir_duplas"]
+        self.ocr_idioma = OPCOES_OCR_PADRAO["idioma"]
+        self.ocr_idiomas_documentos = {} # Caminho do documento -> idioma do OCR escolhido pelo usuário para ele
+        self.pdf_extrator_texto = "auto" # Nome em EXTRATORES_TEXTO_PDF ou "auto" (calibra a cada documento)
+        # PDFs com pelo menos essa quantidade de páginas são extraídos sob demanda (0 = nunca). Desligado por padrão:
+        # a leitura completa é a que usa o cache de documentos, os checkpoints e o OCR em lote
+        self.pdf_sob_demanda_paginas = 0
+        self.pdf_janela_paginas = 8 # Páginas mantidas prontas à frente da posição de leitura no modo sob demanda
+        self.pdf_estrategia = "auto" # Uma de ESTRATEGIAS_PDF ou "auto" (pré-análise de algumas páginas)
+        self.remover_cabecalhos = True # Tira cabeçalhos, rodapés e números de página dos PDFs
+        self.docx_tabelas = OPCOES_DOCX_PADRAO["tabelas"]
+        self.docx_caixas_texto = OPCOES_DOCX_PADRAO["caixas_texto"]
+        self.docx_notas_rodape = OPCOES_DOCX_PADRAO["notas_rodape"]
+        self.docx_notas_fim = OPCOES_DOCX_PADRAO["notas_fim"]
+        self.docx_imagens = OPCOES_DOCX_PADRAO["imagens"]
         
         self.velocidade_inicial_aceleracao = 100
         self.passo_aceleracao = 25
@@ -133,6 +1892,14 @@ class LeitorRapidoApp:
 
         self.carregar_configuracoes()
 
+        # Palavras e parágrafos já processados de cada documento, para reabri-lo sem extrair de novo
+        self.cache_documentos = CacheDisco(os.path.join(self.cache_dir, "documentos"), self.cache_limite_mb * 1024 * 1024)
+        # Texto reconhecido de cada página escaneada: mudanças na limpeza/tokenização nunca refazem o OCR
+        self.cache_ocr = CacheDisco(os.path.join(self.cache_dir, "ocr"), self.cache_ocr_limite_mb * 1024 * 1024)
+        # Páginas já lidas de PDFs cujo carregamento foi interrompido, para retomar de onde parou
+        self.checkpoints = CacheDisco(os.path.join(self.cache_dir, "checkpoints"), CHECKPOINT_LIMITE_MB * 1024 * 1024,
+                                      extensao=".jsonl")
+
         self.palavra_label = tk.Label(master, text="Carregue um arquivo para começar.",
                                       font=("Arial", 48, "bold"), fg="blue", bg="white")
         self.palavra_label.pack(pady=30, fill=tk.BOTH, expand=True)
@@ -167,6 +1934,9 @@ class LeitorRapidoApp:
         self.btn_avancar_paragrafo = tk.Button(self.navigation_frame, text="Parágrafo ->", command=self.avancar_paragrafo, state=tk.DISABLED)
         self.btn_avancar_paragrafo.pack(side=tk.LEFT, padx=5)
 
+        self.btn_capitulos = tk.Button(self.navigation_frame, text="Capítulos", command=self.mostrar_capitulos, state=tk.DISABLED)
+        self.btn_capitulos.pack(side=tk.LEFT, padx=5)
+
 
         self.speed_frame = tk.Frame(self.main_controls_frame)
         self.speed_frame.pack(side=tk.TOP, pady=5)
@@ -179,11 +1949,23 @@ class LeitorRapidoApp:
         self.velocidade_scale.set(self.velocidade_leitura_atual)
         self.velocidade_scale.pack(side=tk.LEFT, padx=5)
 
+        # Indicador de carregamento (visível apenas enquanto um arquivo está sendo extraído)
+        self.frame_carregamento = tk.Frame(master)
+        self.carregamento_label = tk.Label(self.frame_carregamento, text="Carregando...")
+        self.carregamento_label.pack(side=tk.LEFT, padx=5)
+        self.barra_carregamento = ttk.Progressbar(self.frame_carregamento, orient=tk.HORIZONTAL, length=300, mode="indeterminate")
+        self.barra_carregamento.pack(side=tk.LEFT, padx=5)
+        self.btn_cancelar_carregamento = tk.Button(self.frame_carregamento, text="Cancelar", command=self.cancelar_carregamento_atual)
+        self.btn_cancelar_carregamento.pack(side=tk.LEFT, padx=5)
+
         self.frame_progresso = tk.Frame(master)
         self.frame_progresso.pack(pady=10)
 
         self.progresso_label = tk.Label(self.frame_progresso, text="Progresso: 0/0 palavras")
         self.progresso_label.pack(side=tk.LEFT, padx=5)
+
+        self.resumo_label = tk.Label(self.frame_progresso, text="", fg="gray")
+        self.resumo_label.pack(side=tk.LEFT, padx=5)
         
         self.customization_frame = tk.Frame(master)
         self.customization_frame.pack(pady=10)
@@ -209,6 +1991,12 @@ class LeitorRapidoApp:
         self.btn_carregar_progresso = tk.Button(self.progress_controls_frame, text="Carregar Progresso", command=self.carregar_progresso)
         self.btn_carregar_progresso.pack(side=tk.LEFT, padx=5)
 
+        self.btn_cache = tk.Button(self.progress_controls_frame, text="Cache", command=self.gerenciar_cache)
+        self.btn_cache.pack(side=tk.LEFT, padx=5)
+
+        self.btn_idioma_ocr = tk.Button(self.progress_controls_frame, text="Idioma do OCR", command=self.escolher_idioma_ocr)
+        self.btn_idioma_ocr.pack(side=tk.LEFT, padx=5)
+
         self.aplicar_estilo_fonte()
 
         self.master.protocol("WM_DELETE_WINDOW", self.on_closing)
@@ -221,7 +2009,28 @@ class LeitorRapidoApp:
         self.velocidade_leitura_atual_temp = self.velocidade_leitura_atual
 
 
-    def carregar_arquivo(self, caminho_predefinido=None, indice_predefinido=0):
+    def num_processos_ocr(self):
+        """Quantidade de processos usados no OCR em paralelo (configurável em 'ocr_processos')."""
+        if self.ocr_processos and self.ocr_processos > 0:
+            return self.ocr_processos
+        return max(1, (os.cpu_count() or 1) - 1)
+
+    def opcoes_ocr(self, caminho_arquivo=None):
+        """Opções de OCR (formato de OPCOES_OCR_PADRAO) de acordo com as configurações salvas e o idioma escolhido para o documento."""
+        opcoes = dict(OPCOES_OCR_PADRAO)
+        opcoes.update(dois_niveis=self.ocr_dois_niveis, dpi_rapido=self.ocr_dpi_rapido,
+                      dpi_alto=self.ocr_dpi_alto, confianca_minima=self.ocr_confianca_minima,
+                      em_lote=self.ocr_em_lote, preprocessar=self.ocr_preprocessar,
+                      dividir_duplas=self.ocr_dividir_duplas,
+                      idioma=self.ocr_idiomas_documentos.get(caminho_arquivo, self.ocr_idioma))
+        return opcoes
+
+    def opcoes_docx(self):
+        """O que entra na leitura de um .docx (formato de OPCOES_DOCX_PADRAO), de acordo com as configurações salvas."""
+        return {"tabelas": self.docx_tabelas, "caixas_texto": self.docx_caixas_texto,
+                "notas_rodape": self.docx_notas_rodape, "notas_fim": self.docx_notas_fim, "imagens": self.docx_imagens}
+
+    def carregar_arquivo(self, caminho_predefinido=None, indice_predefinido=0, ao_concluir=None, pagina_predefinida=None):
         self.resetar_leitura()
         
         caminho_arquivo = caminho_predefinido
@@ -236,101 +2045,43 @@ class LeitorRapidoApp:
             )
         
         if caminho_arquivo:
+            # Cancela qualquer carregamento/OCR ainda em andamento do arquivo anterior
+            self.cancelar_carregamento.set()
+            self.cancelar_carregamento = threading.Event()
+            self.fila_carregamento = None
+            self.carregando = False
+            self.mostrar_progresso_carregamento(False)
+
             self.habilitar_botoes(False) 
             self.caminho_arquivo_atual = caminho_arquivo
 
-            # Retorna texto como uma única string bruta para limpeza global
-            texto_bruto_extraido = "" 
-            if caminho_arquivo.lower().endswith('.docx'):
-                paragrafos_extraidos = ler_texto_de_docx(caminho_arquivo)
-                if paragrafos_extraidos:
-                    texto_bruto_extraido = "\n\n".join(paragrafos_extraidos)
-            elif caminho_arquivo.lower().endswith('.txt'):
-                paragrafos_extraidos = ler_texto_de_txt(caminho_arquivo)
-                if paragrafos_extraidos:
-                    texto_bruto_extraido = "\n\n".join(paragrafos_extraidos)
-            elif caminho_arquivo.lower().endswith('.pdf'):
-                # ler_texto_de_pdf já retorna uma única string bruta
-                texto_bruto_extraido = ler_texto_de_pdf(caminho_arquivo) 
-            else:
+            if not caminho_arquivo.lower().endswith(('.docx', '.txt', '.pdf')):
                 messagebox.showwarning("Formato Não Suportado", "Por favor, selecione um arquivo .txt, .docx ou .pdf.")
                 self.palavra_label.config(text="Formato não suportado!")
                 self.habilitar_botoes(False)
                 self.caminho_arquivo_atual = None
                 return
-            
-            if texto_bruto_extraido:
-                # --- PRÉ-PROCESSAMENTO ROBUSTO PARA CORRIGIR SEPARAÇÃO DE PALAVRAS E LIMPAR ---
-                
-                # 1. Substitui hifens no final de uma linha e possíveis quebras por NADA (junta palavras hifenizadas)
-                #    Ex: "esfarra-\npados" -> "esfarrapados"
-                #    Regex: um caractere alfanumérico, seguido de hífen, 0 ou mais espaços, 0 ou mais quebras de linha, 0 ou mais espaços,
-                #    seguido de outro caractere alfanumérico. Substitui tudo por \1\2 (grupo 1 e grupo 2)
-                processed_text = re.sub(r'(\w+)-\s*?\n*\s*?(\w+)', r'\1\2', texto_bruto_extraido)
-                
-                # 2. Remove hifens que estão no meio da palavra ou no final, sem quebra de linha.
-                #    Isso lida com "pr-epudável" -> "preprudável" ou "palavra-" -> "palavra" se não for quebra de linha.
-                #    Vamos focar em hifens que conectam partes de palavras e não são hifens gramaticais.
-                #    Um hífen entre duas letras é um candidato.
-                processed_text = re.sub(r'([a-zA-Záéíóúçãõâêôàüñ])-([a-zA-Záéíóúçãõâêôàüñ])', r'\1\2', processed_text)
-                
-                # 3. Substitui TODAS as quebras de linha (que não foram tratadas acima) por um único espaço.
-                #    Isso "achata" todo o documento em uma única linha lógica de palavras.
-                processed_text = processed_text.replace('\n', ' ')
-                
-                # 4. Remove referências de rodapé como "" ou "[X]" que aparecem em PDFs (se o OCR as pega).
-                processed_text = re.sub(r'\|\[\d+\]', '', processed_text)
-                
-                # 5. Normaliza múltiplos espaços para um único espaço e remove espaços do início/fim.
-                processed_text = re.sub(r'\s+', ' ', processed_text).strip()
-                
-                # A regex final para dividir em palavras (\S+) mantém a pontuação anexada.
-                self.palavras = re.findall(r'\S+', processed_text) 
-                
-                # Reconstruindo paragraph_start_indices com uma heurística após a limpeza agressiva:
-                self.paragraph_start_indices = [0]
-                # Adiciona índices de início de parágrafo a cada palavra que termina com ponto final, exclamação, interrogação.
-                # Heurística: Fim de frase (., !, ?) seguido por um espaço.
-                # Para evitar problemas com "Dr. " ou números, a regex é mais cuidadosa.
-                # A intenção é que um novo parágrafo comece após um ponto final verdadeiro de frase.
-                for i, palavra in enumerate(self.palavras):
-                    # Verifica se a palavra termina com pontuação de final de frase
-                    if re.search(r'[.!?]$', palavra):
-                        # E se a próxima palavra não é uma pontuação ou um número (ex: "1. Capítulo")
-                        # e não é o fim do texto
-                        if i + 1 < len(self.palavras) and not re.match(r'^[.,!?;:]+$', self.palavras[i+1]) and not self.palavras[i+1].isdigit():
-                            self.paragraph_start_indices.append(i + 1)
-                
-                # Garante que os índices de parágrafo sejam únicos e em ordem.
-                self.paragraph_start_indices = sorted(list(set(self.paragraph_start_indices)))
-                # Remove o último índice se ele for redundante (aponta para o final do documento)
-                if self.paragraph_start_indices and self.paragraph_start_indices[-1] >= len(self.palavras) - 1:
-                    if len(self.paragraph_start_indices) > 1:
-                        self.paragraph_start_indices.pop()
-                    else: # Se só tinha o 0 e a lista é pequena, mantém o 0
-                        self.paragraph_start_indices = [0]
-
-                if not self.palavras:
-                    messagebox.showwarning("Arquivo Vazio", "O arquivo selecionado não contém texto válido.")
-                    self.palavra_label.config(text="Arquivo vazio ou sem texto válido.")
-                    self.habilitar_botoes(False)
-                    self.caminho_arquivo_atual = None
-                    return
-
-                self.indice_palavra_atual = min(indice_predefinido, len(self.palavras) - 1)
-                if self.indice_palavra_atual < 0: self.indice_palavra_atual = 0
 
-                self.atualizar_exibicao_palavra_sem_avancar()
-                self.btn_iniciar_pausar.config(text="Iniciar")
-                self.esta_lendo = False
-                self.habilitar_botoes(True)
-                self.atualizar_progresso()
-                self.btn_salvar_progresso.config(state=tk.NORMAL)
-            else:
-                messagebox.showwarning("Arquivo Vazio", "O arquivo selecionado não contém texto válido.")
-                self.palavra_label.config(text="Erro ao carregar o arquivo ou arquivo vazio.")
-                self.habilitar_botoes(False)
-                self.caminho_arquivo_atual = None
+            # A extração (e o OCR) roda numa thread separada; a interface acompanha pela fila de mensagens.
+            self.palavras = []
+            self.paragraph_start_indices = []
+            self.inicio_paginas = []
+            self.capitulos = []
+            self.sob_demanda = False
+            self.paginas_pendentes = 0
+            self.pagina_predefinida = pagina_predefinida
+            self.pagina_cursor = pagina_predefinida or 0
+            self.resumo_label.config(text="")
+            self.carregando = True
+            self.leitura_liberada = False
+            self.palavra_label.config(text="Carregando...")
+            self.mostrar_progresso_carregamento(True)
+            self.fila_carregamento = queue.Queue()
+            threading.Thread(target=self.executar_carregamento,
+                             args=(caminho_arquivo, self.fila_carregamento, self.cancelar_carregamento, self.num_processos_ocr(),
+                                   self.opcoes_ocr(caminho_arquivo), self.pdf_extrator_texto, self.pdf_estrategia),
+                             daemon=True).start()
+            self.master.after(16, self.processar_fila_carregamento, self.fila_carregamento, indice_predefinido, ao_concluir)
         else:
             self.habilitar_botoes(False)
             self.btn_carregar.config(state=tk.NORMAL)
@@ -340,8 +2091,464 @@ class LeitorRapidoApp:
                 self.btn_iniciar_pausar.config(text="Iniciar")
                 self.btn_salvar_progresso.config(state=tk.NORMAL)
 
+    def executar_carregamento(self, caminho_arquivo, fila, cancelar, num_processos, opcoes_ocr, extrator_texto, estrategia_pdf):
+        """Roda na thread de carregamento: extrai e tokeniza o texto trecho a trecho, comunicando-se com a interface apenas pela `fila`."""
+        def progresso(etapa, feito, total):
+            fila.put(("progresso", etapa, feito, total))
+
+        def avisar(titulo, mensagem):
+            fila.put(("aviso", titulo, mensagem))
+
+        try:
+            try:
+                chave_cache = chave_cache_documento(caminho_arquivo, opcoes_ocr, self.remover_cabecalhos, self.opcoes_docx(),
+                                                    estrategia_pdf, extrator_texto)
+            except OSError:
+                chave_cache = None # O erro de leitura é tratado (e exibido) pela extração abaixo
+
+            dados_cache = self.cache_documentos.ler(chave_cache) if chave_cache else None
+            if dados_cache:
+                try:
+                    documento = json.loads(dados_cache)
+                    fila.put(("palavras", documento["palavras"], documento["paragraph_start_indices"]))
+                    fila.put(("paginas", documento["inicio_paginas"]))
+                    if documento.get("capitulos"):
+                        fila.put(("capitulos", documento["capitulos"]))
+                    fila.put(("concluido",))
+                    return
+                except (ValueError, KeyError) as e:
+                    print(f"Aviso: Entrada de cache inválida para '{caminho_arquivo}': {e}")
+
+            capitulos = []
+            if caminho_arquivo.lower().endswith('.pdf'):
+                try:
+                    with open(caminho_arquivo, 'rb') as arquivo_pdf:
+                        reader = PyPDF2.PdfReader(arquivo_pdf)
+                        num_pages = len(reader.pages)
+                        capitulos = ler_capitulos_pdf(reader)
+                except Exception:
+                    num_pages = 0 # O erro é tratado (e exibido) pela extração abaixo
+                if capitulos:
+                    fila.put(("capitulos", capitulos))
+                if 0 < self.pdf_sob_demanda_paginas <= num_pages:
+                    self.executar_carregamento_sob_demanda(caminho_arquivo, fila, cancelar, num_processos, opcoes_ocr,
+                                                           extrator_texto, estrategia_pdf)
+                    return
+
+            todas_palavras = []
+            todos_indices = []
+            inicio_paginas = [] # Índice da primeira palavra de cada página (PDF)
+            estatisticas = {}
+            tokenizador = TokenizadorIncremental()
+            checkpoint = None
+            if chave_cache and caminho_arquivo.lower().endswith('.pdf'):
+                self.checkpoints.podar() # Os checkpoints crescem por acréscimo, fora da contagem do CacheDisco
+                checkpoint = self.checkpoints.caminho(chave_cache)
+            trechos = iterar_trechos_documento(caminho_arquivo, num_processos, cancelar, progresso, avisar, self.cache_ocr,
+                                               estatisticas, opcoes_ocr, extrator_texto, estrategia_pdf, checkpoint,
+                                               self.opcoes_docx())
+            detector_cabecalhos = DetectorCabecalhos()
+            if self.remover_cabecalhos:
+                trechos = remover_cabecalhos_e_rodapes(trechos, detector_cabecalhos)
+            for trecho in trechos:
+                if trecho.pagina is not None:
+                    inicio_paginas.append(tokenizador.posicao_atual())
+                    fila.put(("paginas", inicio_paginas[-1:]))
+                if trecho.nivel_titulo is not None and trecho.texto.strip():
+                    capitulos.append(Capitulo(trecho.nivel_titulo, " ".join(trecho.texto.split()), None,
+                                              tokenizador.posicao_atual()))
+                    fila.put(("capitulo", capitulos[-1]))
+                palavras, paragraph_start_indices = tokenizador.alimentar(trecho.texto + "\n\n")
+                if palavras or paragraph_start_indices:
+                    fila.put(("palavras", palavras, paragraph_start_indices))
+                    todas_palavras.extend(palavras)
+                    todos_indices.extend(paragraph_start_indices)
+
+            if cancelar.is_set():
+                fila.put(("cancelado",))
+                return
+
+            palavras, paragraph_start_indices = tokenizador.finalizar()
+            if palavras or paragraph_start_indices:
+                fila.put(("palavras", palavras, paragraph_start_indices))
+                todas_palavras.extend(palavras)
+                todos_indices.extend(paragraph_start_indices)
+            if estatisticas:
+                fila.put(("resumo", f"{estatisticas['paginas']} páginas (estratégia '{estatisticas['estrategia']}'): "
+                                    f"{estatisticas['ocr']} com OCR "
+                                    f"({estatisticas['ocr_alta_resolucao']} em alta resolução), "
+                                    f"{estatisticas['ocr_evitado']} páginas curtas dispensaram o OCR, "
+                                    f"{estatisticas['retomadas']} páginas retomadas de uma leitura interrompida, "
+                                    f"{detector_cabecalhos.linhas_removidas} linhas de cabeçalho/rodapé removidas"))
+            fila.put(("concluido",))
+
+            # Estimativa por baixo do JSON: evita montar na memória um documento que o cache recusaria
+            tamanho_estimado = sum(map(len, todas_palavras)) + 4 * len(todas_palavras)
+            if chave_cache and todas_palavras and tamanho_estimado <= self.cache_documentos.limite_bytes:
+                try:
+                    documento = {"palavras": todas_palavras, "paragraph_start_indices": todos_indices,
+                                 "inicio_paginas": inicio_paginas, "capitulos": capitulos}
+                    self.cache_documentos.gravar(chave_cache, json.dumps(documento, ensure_ascii=False).encode('utf-8'))
+                except OSError as e:
+                    print(f"Aviso: Não foi possível gravar o cache do documento: {e}")
+        except ErroLeituraArquivo as e:
+            fila.put(("erro", e.titulo, e.mensagem))
+        except Exception as e:
+            fila.put(("erro", "Erro ao Carregar", f"Não foi possível carregar o arquivo:\n{e}"))
+
+    def executar_carregamento_sob_demanda(self, caminho_arquivo, fila, cancelar, num_processos, opcoes_ocr, extrator_texto,
+                                          estrategia_pdf="auto"):
+        """Roda na thread de carregamento no modo sob demanda: extrai só as páginas próximas da leitura."""
+        executor = None
+        em_ocr = {} # Página -> futuro do OCR
+        classificadas = {} # Página -> (classe, texto da camada de texto)
+        prontas = set()
+        lidas = {} # Página -> texto já extraído/reconhecido, à espera das páginas seguintes para tirar os cabeçalhos
+        detector_cabecalhos = DetectorCabecalhos()
+        adiante = CABECALHO_PAGINAS_ADIANTE if self.remover_cabecalhos else 0
+
+        def guardar(i, texto):
+            if self.remover_cabecalhos:
+                detector_cabecalhos.observar(texto, i)
+            lidas[i] = texto
+            classificadas.pop(i, None)
+
+        def entregar_liberadas():
+            # Como em remover_cabecalhos_e_rodapes, uma página só sai depois que as `adiante` seguintes foram vistas
+            for i in sorted(lidas):
+                if any(j not in lidas and j not in prontas for j in range(i + 1, min(i + adiante + 1, num_pages))):
+                    continue
+                texto = lidas.pop(i)
+                if self.remover_cabecalhos:
+                    texto = detector_cabecalhos.limpar(texto, i)
+                palavras, paragraph_start_indices = preprocessar_texto(texto)
+                fila.put(("pagina", i, palavras, [p for p in paragraph_start_indices if p < len(palavras)]))
+                prontas.add(i)
+
+        try:
+            with open(caminho_arquivo, 'rb') as arquivo_pdf:
+                reader = PyPDF2.PdfReader(arquivo_pdf)
+                num_pages = len(reader.pages)
+                if extrator_texto == "auto":
+                    extrator_texto, _ = calibrar_extrator_texto_pdf(caminho_arquivo, reader)
+                elif extrator_texto not in extratores_texto_pdf_disponiveis():
+                    extrator_texto = "pypdf2"
+                ocr_disponivel = os.path.exists(TESSERACT_CMD_PATH)
+                if estrategia_pdf == "auto":
+                    estrategia_pdf = pre_analisar_pdf(caminho_arquivo, reader)["estrategia"]
+                if estrategia_pdf == "ocr" and not ocr_disponivel:
+                    estrategia_pdf = "hibrida" # Sem Tesseract, a camada de texto é tudo o que há
+                impressao_digital = impressao_digital_arquivo(caminho_arquivo)
+                fila.put(("estrutura", num_pages, PDF_PALAVRAS_POR_PAGINA_ESTIMADAS))
+
+                def classificar_a_partir_de(i, janela):
+                    # Páginas seguidas da janela ainda não vistas são extraídas numa única chamada ao extrator
+                    ultima = i
+                    while ultima + 1 in janela and not any(ultima + 1 in d for d in (classificadas, lidas, prontas, em_ocr)):
+                        ultima += 1
+                    if estrategia_pdf == "ocr":
+                        textos = [""] * (ultima - i + 1) # A camada de texto só é lida se o OCR da página falhar
+                    else:
+                        textos = _extrair_bloco_texto_pdf(caminho_arquivo, reader, extrator_texto, i, ultima)
+                    for j, page_text in enumerate(textos, start=i):
+                        if estrategia_pdf == "ocr":
+                            classe = "digitalizada"
+                        elif estrategia_pdf == "texto" and len(page_text.strip()) >= 50:
+                            classe = "texto"
+                        else:
+                            classe = classificar_pagina_pdf(reader.pages[j], page_text)
+                        classificadas[j] = (classe, page_text)
+
+                def texto_camada(i):
+                    page_text = classificadas[i][1]
+                    if estrategia_pdf == "ocr":
+                        page_text = _extrair_bloco_texto_pdf(caminho_arquivo, reader, extrator_texto, i, i)[0]
+                    return page_text
+
+                while len(prontas) < num_pages and not cancelar.is_set():
+                    for i, futuro in list(em_ocr.items()):
+                        if not futuro.done():
+                            continue
+                        del em_ocr[i]
+                        try:
+                            guardar(i, futuro.result()[0][1] if futuro.result() else texto_camada(i))
+                        except Exception as ocr_e:
+                            print(f"Aviso: Erro ao tentar OCR na página {i+1}: {ocr_e}")
+                            guardar(i, texto_camada(i))
+                    entregar_liberadas()
+
+                    cursor = min(max(self.pagina_cursor, 0), num_pages - 1)
+                    # A janela inclui as páginas que o detector de cabeçalhos precisa ver depois da última
+                    janela = range(cursor, min(cursor + self.pdf_janela_paginas + adiante + 1, num_pages))
+                    for i, futuro in list(em_ocr.items()):
+                        if i not in janela and futuro.cancel():
+                            del em_ocr[i]
+
+                    # Próxima página da janela que pode andar agora, da mais próxima do cursor para a mais distante
+                    acao = False
+                    for i in janela:
+                        if i in prontas or i in lidas or i in em_ocr:
+                            continue
+                        if i not in classificadas:
+                            classificar_a_partir_de(i, janela)
+                        classe, page_text = classificadas[i]
+                        if classe != "digitalizada" or not ocr_disponivel:
+                            guardar(i, texto_camada(i))
+                        else:
+                            if opcoes_ocr["idioma"] == "auto": # Detectado na primeira página escaneada, antes de consultar o cache
+                                opcoes_ocr = dict(opcoes_ocr, idioma=detectar_idioma_pdf(caminho_arquivo, reader,
+                                                                                         dpi=opcoes_ocr["dpi_rapido"]))
+                            texto_cache = self.cache_ocr.ler(chave_cache_ocr(impressao_digital, i, opcoes_ocr))
+                            if texto_cache is not None:
+                                guardar(i, json.loads(texto_cache)["texto"])
+                            elif len(em_ocr) < num_processos:
+                                if executor is None:
+                                    executor = concurrent.futures.ProcessPoolExecutor(max_workers=num_processos)
+                                    if opcoes_ocr.get("preprocessar") and "rotacao" not in opcoes_ocr:
+                                        opcoes_ocr = dict(opcoes_ocr, rotacao=detectar_orientacao_pdf(caminho_arquivo, i))
+                                em_ocr[i] = executor.submit(_ocr_intervalo_pdf, caminho_arquivo, i, i, opcoes_ocr)
+                                em_ocr[i].add_done_callback(lambda f, i=i: self._gravar_ocr_sob_demanda(f, impressao_digital, i, opcoes_ocr))
+                            else:
+                                continue
+                        acao = True
+                        break
+
+                    if not acao:
+                        if em_ocr:
+                            concurrent.futures.wait(list(em_ocr.values()), timeout=0.1,
+                                                    return_when=concurrent.futures.FIRST_COMPLETED)
+                        else:
+                            cancelar.wait(0.1)
+
+            if not cancelar.is_set():
+                fila.put(("concluido",))
+        except Exception as e:
+            fila.put(("erro", "Erro ao Ler PDF", f"Não foi possível ler o arquivo PDF ou processar OCR:\n{e}"))
+        finally:
+            if executor is not None:
+                executor.shutdown(wait=False, cancel_futures=True)
+
+    def _gravar_ocr_sob_demanda(self, futuro, impressao_digital, indice_pagina, opcoes_ocr):
+        """Guarda no cache de OCR o texto de uma página reconhecida no modo sob demanda."""
+        if futuro.cancelled() or futuro.exception() is not None or not futuro.result():
+            return
+        _, texto, dpi = futuro.result()[0]
+        try:
+            self.cache_ocr.gravar(chave_cache_ocr(impressao_digital, indice_pagina, opcoes_ocr),
+                                  json.dumps({"texto": texto, "dpi": dpi}, ensure_ascii=False).encode('utf-8'))
+        except OSError as e:
+            print(f"Aviso: Não foi possível gravar o OCR da página {indice_pagina+1} no cache: {e}")
+
+    def montar_estrutura_sob_demanda(self, num_paginas, palavras_por_pagina):
+        """Prepara a lista de palavras de um documento sob demanda com a quantidade estimada de palavras de cada página."""
+        self.sob_demanda = True
+        self.paginas_pendentes = num_paginas
+        self.palavras = [None] * (num_paginas * palavras_por_pagina)
+        self.inicio_paginas = [i * palavras_por_pagina for i in range(num_paginas)]
+        self.paragraph_start_indices = list(self.inicio_paginas)
+        # A extração continua em segundo plano: a barra (e o botão Cancelar) ficam até a thread terminar
+        self.atualizar_progresso_carregamento("Extraindo em segundo plano", 0, num_paginas)
+        self.atualizar_resumo_sob_demanda()
+
+    def inserir_pagina_sob_demanda(self, indice_pagina, palavras, indices_paragrafos):
+        """Troca a estimativa de uma página pelas palavras extraídas, deslocando os índices das páginas seguintes."""
+        inicio = self.inicio_paginas[indice_pagina]
+        fim = self.inicio_paginas[indice_pagina + 1] if indice_pagina + 1 < len(self.inicio_paginas) else len(self.palavras)
+        deslocamento = len(palavras) - (fim - inicio)
+        self.palavras[inicio:fim] = palavras
+        for j in range(indice_pagina + 1, len(self.inicio_paginas)):
+            self.inicio_paginas[j] += deslocamento
+
+        a = bisect.bisect_left(self.paragraph_start_indices, inicio)
+        b = bisect.bisect_left(self.paragraph_start_indices, fim)
+        seguintes = [p + deslocamento for p in self.paragraph_start_indices[b:]]
+        self.paragraph_start_indices[a:] = [inicio + p for p in indices_paragrafos] + seguintes
+
+        if self.indice_palavra_atual >= fim:
+            self.indice_palavra_atual += deslocamento
+        elif self.indice_palavra_atual > inicio:
+            self.indice_palavra_atual = inicio # Estava numa posição estimada da página: vai para o começo dela
+        self.paginas_pendentes -= 1
+        num_paginas = len(self.inicio_paginas)
+        self.atualizar_progresso_carregamento("Extraindo em segundo plano", num_paginas - self.paginas_pendentes, num_paginas)
+        self.atualizar_resumo_sob_demanda()
+
+    def atualizar_resumo_sob_demanda(self):
+        num_paginas = len(self.inicio_paginas)
+        self.resumo_label.config(text=f"Sob demanda: {num_paginas - self.paginas_pendentes}/{num_paginas} páginas extraídas")
+
+    def processar_fila_carregamento(self, fila, indice_predefinido, ao_concluir):
+        """Consome as mensagens da thread de carregamento (chamada periodicamente via master.after)."""
+        if fila is not self.fila_carregamento:
+            return # Carregamento antigo, substituído por outro arquivo
+
+        chegaram_palavras = False
+        try:
+            while True:
+                mensagem = fila.get_nowait()
+                tipo = mensagem[0]
+                if tipo == "palavras":
+                    self.palavras.extend(mensagem[1])
+                    self.paragraph_start_indices.extend(mensagem[2])
+                    chegaram_palavras = True
+                elif tipo == "resumo":
+                    self.resumo_label.config(text=mensagem[1])
+                elif tipo == "paginas":
+                    self.inicio_paginas.extend(mensagem[1])
+                elif tipo == "capitulos":
+                    self.capitulos = [Capitulo(*capitulo) for capitulo in mensagem[1]]
+                    if self.leitura_liberada:
+                        self.btn_capitulos.config(state=tk.NORMAL)
+                elif tipo == "capitulo": # Título encontrado durante a extração (.docx)
+                    self.capitulos.append(mensagem[1])
+                    if self.leitura_liberada:
+                        self.btn_capitulos.config(state=tk.NORMAL)
+                elif tipo == "estrutura":
+                    self.montar_estrutura_sob_demanda(*mensagem[1:])
+                    if self.pagina_predefinida is not None and self.pagina_predefinida < len(self.inicio_paginas):
+                        indice_predefinido = self.inicio_paginas[self.pagina_predefinida]
+                    self.liberar_leitura(indice_predefinido)
+                    if ao_concluir:
+                        ao_concluir()
+                        ao_concluir = None
+                elif tipo == "pagina":
+                    self.inserir_pagina_sob_demanda(*mensagem[1:])
+                    chegaram_palavras = True
+                elif tipo == "progresso":
+                    self.atualizar_progresso_carregamento(*mensagem[1:])
+                elif tipo == "aviso":
+                    messagebox.showwarning(mensagem[1], mensagem[2])
+                elif tipo == "concluido":
+                    self.finalizar_carregamento(indice_predefinido)
+                    if ao_concluir and self.palavras:
+                        ao_concluir()
+                    return
+                elif tipo == "erro":
+                    self.carregando = False
+                    self.fila_carregamento = None
+                    self.mostrar_progresso_carregamento(False)
+                    messagebox.showerror(mensagem[1], mensagem[2])
+                    self.palavras = []
+                    self.inicio_paginas = []
+                    self.capitulos = []
+                    self.paragraph_start_indices = []
+                    self.sob_demanda = False
+                    self.resetar_leitura()
+                    self.palavra_label.config(text="Erro ao carregar o arquivo ou arquivo vazio.")
+                    self.habilitar_botoes(False)
+                    self.caminho_arquivo_atual = None
+                    return
+                elif tipo == "cancelado":
+                    self.carregando = False
+                    self.mostrar_progresso_carregamento(False)
+                    return
+        except queue.Empty:
+            pass
+
+        if chegaram_palavras:
+            if not self.leitura_liberada:
+                if len(self.palavras) >= self.palavras_para_iniciar and len(self.palavras) > indice_predefinido:
+                    self.liberar_leitura(indice_predefinido)
+            else:
+                if self.sob_demanda and not self.esta_lendo:
+                    self.atualizar_exibicao_palavra_sem_avancar() # A página sob o cursor pode ter acabado de chegar
+                self.atualizar_progresso()
+
+        self.master.after(16, self.processar_fila_carregamento, fila, indice_predefinido, ao_concluir)
+
+    def liberar_leitura(self, indice_predefinido):
+        """Habilita a leitura com as palavras já disponíveis (o restante pode continuar chegando)."""
+        self.leitura_liberada = True
+        self.indice_palavra_atual = min(indice_predefinido, len(self.palavras) - 1)
+        if self.indice_palavra_atual < 0: self.indice_palavra_atual = 0
+
+        self.atualizar_exibicao_palavra_sem_avancar()
+        self.btn_iniciar_pausar.config(text="Iniciar")
+        self.esta_lendo = False
+        self.habilitar_botoes(True)
+        self.atualizar_progresso()
+        self.btn_salvar_progresso.config(state=tk.NORMAL)
+
+    def finalizar_carregamento(self, indice_predefinido):
+        self.carregando = False
+        self.fila_carregamento = None
+        self.mostrar_progresso_carregamento(False)
+
+        if not self.palavras:
+            messagebox.showwarning("Arquivo Vazio", "O arquivo selecionado não contém texto válido.")
+            self.palavra_label.config(text="Arquivo vazio ou sem texto válido.")
+            self.habilitar_botoes(False)
+            self.caminho_arquivo_atual = None
+            return
+
+        if not self.paragraph_start_indices:
+            self.paragraph_start_indices = [0]
+        if not self.leitura_liberada:
+            self.liberar_leitura(indice_predefinido)
+        else:
+            self.atualizar_progresso()
+
+    def cancelar_carregamento_atual(self):
+        """Botão 'Cancelar': interrompe a extração/OCR; o que já foi liberado para leitura continua disponível."""
+        self.cancelar_carregamento.set()
+        self.fila_carregamento = None
+        self.carregando = False
+        self.mostrar_progresso_carregamento(False)
+        if self.leitura_liberada:
+            self.atualizar_progresso()
+            return
+        self.palavras = []
+        self.inicio_paginas = []
+        self.capitulos = []
+        self.paragraph_start_indices = []
+        self.sob_demanda = False
+        self.caminho_arquivo_atual = None
+        self.palavra_label.config(text="Carregamento cancelado.")
+        self.habilitar_botoes(False)
+
+    def mostrar_progresso_carregamento(self, mostrar):
+        if mostrar:
+            self.barra_carregamento.config(mode="indeterminate", value=0)
+            self.barra_carregamento.start(20)
+            self.carregamento_label.config(text="Carregando...")
+            self.frame_carregamento.pack(pady=5, before=self.frame_progresso)
+        else:
+            self.barra_carregamento.stop()
+            self.frame_carregamento.pack_forget()
+
+    def atualizar_progresso_carregamento(self, etapa, feito, total):
+        if total == 0:
+            self.carregamento_label.config(text=f"{etapa}: {feito} parágrafos")
+        elif total > 1:
+            if str(self.barra_carregamento.cget("mode")) != "determinate":
+                self.barra_carregamento.stop()
+                self.barra_carregamento.config(mode="determinate")
+            self.barra_carregamento.config(maximum=total, value=feito)
+            self.carregamento_label.config(text=f"{etapa}: página {feito}/{total}")
+        else:
+            self.carregamento_label.config(text=f"{etapa}...")
+
+    def texto_palavra(self, indice):
+        """Palavra a exibir no índice dado (no modo sob demanda, a página pode ainda não ter sido extraída)."""
+        palavra = self.palavras[indice]
+        return "Carregando..." if palavra is None else palavra
+
     def atualizar_exibicao_palavra(self):
-        if self.indice_palavra_atual < len(self.palavras):
+        if self.indice_palavra_atual < len(self.palavras) and self.palavras[self.indice_palavra_atual] is None:
+            # Modo sob demanda: a página da posição atual ainda está sendo extraída
+            self.atualizar_progresso()
+            if self.carregando:
+                self.palavra_label.config(text="Carregando...")
+                if self.esta_lendo:
+                    self.job_id = self.master.after(100, self.atualizar_exibicao_palavra)
+            else:
+                # Extração cancelada antes de chegar a esta página: pausa em vez de seguir no marcador
+                self.palavra_label.config(text="Página não extraída.")
+                if self.esta_lendo:
+                    self.esta_lendo = False
+                    self.btn_iniciar_pausar.config(text="Continuar")
+                    self.job_id = None
+        elif self.indice_palavra_atual < len(self.palavras):
             self.palavra_label.config(text=self.palavras[self.indice_palavra_atual])
             self.indice_palavra_atual += 1
             self.atualizar_progresso()
@@ -357,6 +2564,11 @@ class LeitorRapidoApp:
 
             if self.esta_lendo:
                 self.job_id = self.master.after(int(tempo_por_palavra_ms), self.atualizar_exibicao_palavra)
+        elif self.carregando:
+            # Alcançou o fim do que já foi extraído: espera as próximas palavras chegarem
+            self.palavra_label.config(text="Carregando...")
+            if self.esta_lendo:
+                self.job_id = self.master.after(100, self.atualizar_exibicao_palavra)
         else:
             self.palavra_label.config(text="Fim da leitura!")
             self.esta_lendo = False
@@ -379,7 +2591,7 @@ class LeitorRapidoApp:
         else:
             self.esta_lendo = True
             self.btn_iniciar_pausar.config(text="Pausar")
-            if self.indice_palavra_atual >= len(self.palavras):
+            if self.indice_palavra_atual >= len(self.palavras) and not self.carregando:
                 self.indice_palavra_atual = 0
                 self.atualizar_progresso()
             
@@ -399,7 +2611,7 @@ class LeitorRapidoApp:
         self.velocidade_leitura_atual_temp = self.velocidade_scale.get() 
 
         if self.palavras:
-            self.palavra_label.config(text=self.palavras[0])
+            self.palavra_label.config(text=self.texto_palavra(0))
             self.btn_iniciar_pausar.config(text="Iniciar")
             self.btn_iniciar_pausar.config(state=tk.NORMAL)
             self.btn_resetar.config(state=tk.NORMAL)
@@ -416,7 +2628,15 @@ class LeitorRapidoApp:
     def atualizar_progresso(self):
         total_palavras = len(self.palavras)
         palavras_lidas = min(self.indice_palavra_atual, total_palavras)
-        self.progresso_label.config(text=f"Progresso: {palavras_lidas}/{total_palavras} palavras")
+        # Enquanto houver páginas sob demanda não extraídas, o total é uma estimativa
+        texto = f"Progresso: {palavras_lidas}/{'~' if self.paginas_pendentes else ''}{total_palavras} palavras"
+        if self.inicio_paginas:
+            pagina = bisect.bisect_right(self.inicio_paginas, palavras_lidas)
+            texto += f" - página {max(pagina, 1)}"
+            self.pagina_cursor = max(pagina, 1) - 1
+        if self.carregando:
+            texto += " (carregando...)"
+        self.progresso_label.config(text=texto)
     
     def habilitar_botoes(self, habilitar):
         self.btn_carregar.config(state=tk.NORMAL) 
@@ -428,6 +2648,7 @@ class LeitorRapidoApp:
             self.btn_voltar_paragrafo.config(state=tk.NORMAL)
             self.btn_avancar_10.config(state=tk.NORMAL)
             self.btn_avancar_paragrafo.config(state=tk.NORMAL)
+            self.btn_capitulos.config(state=tk.NORMAL if self.capitulos else tk.DISABLED)
             self.btn_salvar_progresso.config(state=tk.NORMAL)
         else:
             self.btn_iniciar_pausar.config(state=tk.DISABLED)
@@ -436,6 +2657,7 @@ class LeitorRapidoApp:
             self.btn_voltar_paragrafo.config(state=tk.DISABLED)
             self.btn_avancar_10.config(state=tk.DISABLED)
             self.btn_avancar_paragrafo.config(state=tk.DISABLED)
+            self.btn_capitulos.config(state=tk.DISABLED)
             self.btn_salvar_progresso.config(state=tk.DISABLED)
 
     # --- Funções de Navegação (Voltar) ---
@@ -509,17 +2731,79 @@ class LeitorRapidoApp:
         self.atualizar_exibicao_palavra_sem_avancar()
         self.btn_iniciar_pausar.config(text="Continuar")
 
+    def mostrar_capitulos(self):
+        """Abre uma janela com o sumário do documento; um duplo clique (ou 'Ir') leva ao início do capítulo."""
+        if not self.capitulos: return
+        janela = tk.Toplevel(self.master)
+        janela.title("Capítulos")
+        janela.transient(self.master)
+
+        lista = tk.Listbox(janela, width=60, height=20)
+        barra = tk.Scrollbar(janela, orient=tk.VERTICAL, command=lista.yview)
+        lista.config(yscrollcommand=barra.set)
+        for capitulo in self.capitulos:
+            pagina = f"  (p. {capitulo.pagina + 1})" if capitulo.pagina is not None else ""
+            lista.insert(tk.END, f"{'    ' * capitulo.nivel}{capitulo.titulo}{pagina}")
+        lista.grid(row=0, column=0, padx=(10, 0), pady=10, sticky="nsew")
+        barra.grid(row=0, column=1, padx=(0, 10), pady=10, sticky="ns")
+
+        # Destaca o capítulo da posição atual
+        if self.capitulos[0].indice_palavra is not None:
+            atual = bisect.bisect_right([capitulo.indice_palavra for capitulo in self.capitulos], self.indice_palavra_atual) - 1
+        else:
+            pagina_atual = bisect.bisect_right(self.inicio_paginas, self.indice_palavra_atual) - 1
+            atual = bisect.bisect_right([capitulo.pagina for capitulo in self.capitulos], pagina_atual) - 1
+        if atual >= 0:
+            lista.selection_set(atual)
+            lista.see(atual)
+
+        def ir():
+            selecao = lista.curselection()
+            if selecao and self.ir_para_capitulo(self.capitulos[selecao[0]]):
+                janela.destroy()
+
+        lista.bind("<Double-Button-1>", lambda evento: ir())
+        frame_botoes = tk.Frame(janela)
+        frame_botoes.grid(row=1, column=0, columnspan=2, pady=(0, 10))
+        tk.Button(frame_botoes, text="Ir", command=ir).pack(side=tk.LEFT, padx=5)
+        tk.Button(frame_botoes, text="Fechar", command=janela.destroy).pack(side=tk.LEFT, padx=5)
+
+    def ir_para_capitulo(self, capitulo):
+        """Posiciona a leitura no início do capítulo. Retorna False se ele ainda não foi carregado."""
+        if capitulo.indice_palavra is not None:
+            indice = capitulo.indice_palavra
+        elif capitulo.pagina < len(self.inicio_paginas):
+            indice = self.inicio_paginas[capitulo.pagina]
+        else:
+            indice = None
+        if indice is None or indice >= len(self.palavras):
+            if capitulo.pagina is not None:
+                mensagem = f"A página {capitulo.pagina + 1} ainda está sendo extraída."
+            else:
+                mensagem = f"O capítulo '{capitulo.titulo}' ainda está sendo extraído."
+            messagebox.showinfo("Capítulo Ainda Não Carregado", mensagem + " Tente novamente em instantes.")
+            return False
+        self.esta_lendo = False
+        if self.job_id:
+            self.master.after_cancel(self.job_id)
+            self.job_id = None
+
+        self.indice_palavra_atual = indice
+        self.atualizar_exibicao_palavra_sem_avancar()
+        self.btn_iniciar_pausar.config(text="Continuar")
+        return True
+
     def atualizar_exibicao_palavra_sem_avancar(self):
         """Atualiza o label com a palavra atual no índice atual, sem avançar o índice."""
         if self.indice_palavra_atual < len(self.palavras):
-            self.palavra_label.config(text=self.palavras[self.indice_palavra_atual])
+            self.palavra_label.config(text=self.texto_palavra(self.indice_palavra_atual))
         else:
             self.indice_palavra_atual = len(self.palavras) - 1 
             if self.indice_palavra_atual < 0:
                 self.palavra_label.config(text="Fim da leitura!")
                 self.indice_palavra_atual = 0
             else:
-                self.palavra_label.config(text=self.palavras[self.indice_palavra_atual])
+                self.palavra_label.config(text=self.texto_palavra(self.indice_palavra_atual))
 
         self.atualizar_progresso()
 
@@ -573,6 +2857,9 @@ class LeitorRapidoApp:
             "caminho_arquivo": self.caminho_arquivo_atual,
             "indice_palavra": self.indice_palavra_atual
         }
+        if self.inicio_paginas:
+            # No modo sob demanda os índices dependem das estimativas; a página permite retomar do mesmo ponto
+            dados_progresso["pagina"] = self.pagina_cursor
         try:
             with open(caminho_completo_salvar, 'w', encoding='utf-8') as f:
                 json.dump(dados_progresso, f, indent=4)
@@ -593,6 +2880,7 @@ class LeitorRapidoApp:
                 
                 caminho_arquivo_salvo = dados_progresso.get("caminho_arquivo")
                 indice_palavra_salvo = dados_progresso.get("indice_palavra", 0)
+                pagina_salva = dados_progresso.get("pagina")
 
                 if not caminho_arquivo_salvo:
                     messagebox.showwarning("Erro de Progresso", "O arquivo de progresso não contém o caminho do arquivo original.")
@@ -617,8 +2905,9 @@ class LeitorRapidoApp:
                         messagebox.showinfo("Cancelado", "Operação de carregamento de progresso cancelada.")
                         return
 
-                self.carregar_arquivo(caminho_predefinido=caminho_arquivo_salvo, indice_predefinido=indice_palavra_salvo)
-                messagebox.showinfo("Progresso Carregado", "Progresso carregado com sucesso!")
+                self.carregar_arquivo(caminho_predefinido=caminho_arquivo_salvo, indice_predefinido=indice_palavra_salvo,
+                                      ao_concluir=lambda: messagebox.showinfo("Progresso Carregado", "Progresso carregado com sucesso!"),
+                                      pagina_predefinida=pagina_salva)
 
             except FileNotFoundError:
                 messagebox.showerror("Erro ao Carregar", "Arquivo de progresso não encontrado.")
@@ -627,6 +2916,73 @@ class LeitorRapidoApp:
             except Exception as e:
                 messagebox.showerror("Erro ao Carregar", f"Não foi possível carregar o progresso:\n{e}")
 
+    # --- IDIOMA DO OCR ---
+    def escolher_idioma_ocr(self):
+        """Define o idioma do OCR do documento atual (ou volta à detecção automática) e recarrega o documento com ele."""
+        caminho_arquivo = self.caminho_arquivo_atual
+        if not caminho_arquivo:
+            messagebox.showwarning("Sem Arquivo", "Carregue um documento para escolher o idioma do OCR dele.")
+            return
+        atual = self.ocr_idiomas_documentos.get(caminho_arquivo, "auto")
+        idioma = simpledialog.askstring("Idioma do OCR",
+                                        "Idioma(s) do Tesseract para este documento (ex: por, eng, spa, fra, por+eng)\n"
+                                        "ou 'auto' para detectar pelo texto:", initialvalue=atual)
+        if idioma is None:
+            return
+        idioma = idioma.strip().lower() or "auto"
+        if not re.fullmatch(r"auto|[a-z_]+(\+[a-z_]+)*", idioma):
+            messagebox.showerror("Idioma Inválido", f"'{idioma}' não é um código de idioma do Tesseract.")
+            return
+        instalados = idiomas_tesseract_instalados()
+        faltando = [codigo for codigo in idioma.split("+") if instalados is not None and idioma != "auto" and codigo not in instalados]
+        if faltando:
+            messagebox.showerror("Idioma Não Instalado", f"O Tesseract não tem o(s) idioma(s): {', '.join(faltando)}.")
+            return
+        if idioma == atual:
+            return
+        if idioma == "auto":
+            self.ocr_idiomas_documentos.pop(caminho_arquivo, None)
+        else:
+            self.ocr_idiomas_documentos[caminho_arquivo] = idioma
+        self.salvar_configuracoes()
+        # Só as páginas escaneadas passam de novo pelo OCR, agora com o novo idioma
+        self.carregar_arquivo(caminho_predefinido=caminho_arquivo, indice_predefinido=self.indice_palavra_atual,
+                              pagina_predefinida=self.pagina_cursor if self.inicio_paginas else None)
+
+    # --- MÉTODOS DO CACHE ---
+    def gerenciar_cache(self):
+        """Abre uma janela com a ocupação dos caches (documentos, OCR e checkpoints) e opções para podá-los ou limpá-los."""
+        janela = tk.Toplevel(self.master)
+        janela.title("Cache")
+        janela.transient(self.master)
+
+        caches = [("Documentos processados", self.cache_documentos, self.cache_limite_mb),
+                  ("Páginas reconhecidas por OCR", self.cache_ocr, self.cache_ocr_limite_mb),
+                  ("Leituras interrompidas (checkpoints)", self.checkpoints, CHECKPOINT_LIMITE_MB)]
+        for linha, (nome, cache, limite_mb) in enumerate(caches):
+            info_label = tk.Label(janela, justify=tk.LEFT)
+            info_label.grid(row=linha, column=0, padx=10, pady=5, sticky="w")
+
+            def atualizar(cache=cache, nome=nome, limite_mb=limite_mb, info_label=info_label):
+                entradas, total_bytes = cache.informacoes()
+                info_label.config(text=f"{nome}: {entradas} entradas\n"
+                                       f"{total_bytes / (1024 * 1024):.1f} MB de {limite_mb} MB")
+
+            def podar_metade(cache=cache, atualizar=atualizar):
+                cache.podar(cache.limite_bytes // 2)
+                atualizar()
+
+            def limpar(cache=cache, atualizar=atualizar):
+                cache.limpar()
+                atualizar()
+
+            atualizar()
+            tk.Button(janela, text="Reduzir à metade", command=podar_metade).grid(row=linha, column=1, padx=5)
+            tk.Button(janela, text="Limpar", command=limpar).grid(row=linha, column=2, padx=5)
+
+        tk.Label(janela, text=f"Local: {self.cache_dir}").grid(row=len(caches), column=0, columnspan=3, padx=10, pady=5, sticky="w")
+        tk.Button(janela, text="Fechar", command=janela.destroy).grid(row=len(caches) + 1, column=0, columnspan=3, pady=10)
+
     # --- MÉTODOS DE CONFIGURAÇÕES PERSISTENTES ---
     def salvar_configuracoes(self):
         """Salva as configurações atuais (velocidade, cores, fonte) em um arquivo JSON."""
@@ -635,7 +2991,29 @@ class LeitorRapidoApp:
             "cor_texto": self.cor_texto_atual,
             "cor_fundo": self.cor_fundo_atual,
             "tamanho_fonte": self.tamanho_fonte_atual,
-            "nome_fonte": self.nome_fonte_atual
+            "nome_fonte": self.nome_fonte_atual,
+            "ocr_processos": self.ocr_processos,
+            "cache_limite_mb": self.cache_limite_mb,
+            "cache_ocr_limite_mb": self.cache_ocr_limite_mb,
+            "ocr_dois_niveis": self.ocr_dois_niveis,
+            "ocr_dpi_rapido": self.ocr_dpi_rapido,
+            "ocr_dpi_alto": self.ocr_dpi_alto,
+            "ocr_confianca_minima": self.ocr_confianca_minima,
+            "ocr_em_lote": self.ocr_em_lote,
+            "ocr_preprocessar": self.ocr_preprocessar,
+            "ocr_dividir_duplas": self.ocr_dividir_duplas,
+            "ocr_idioma": self.ocr_idioma,
+            "ocr_idiomas_documentos": self.ocr_idiomas_documentos,
+            "pdf_extrator_texto": self.pdf_extrator_texto,
+            "pdf_sob_demanda_paginas": self.pdf_sob_demanda_paginas,
+            "pdf_janela_paginas": self.pdf_janela_paginas,
+            "pdf_estrategia": self.pdf_estrategia,
+            "remover_cabecalhos": self.remover_cabecalhos,
+            "docx_tabelas": self.docx_tabelas,
+            "docx_caixas_texto": self.docx_caixas_texto,
+            "docx_notas_rodape": self.docx_notas_rodape,
+            "docx_notas_fim": self.docx_notas_fim,
+            "docx_imagens": self.docx_imagens
         }
         try:
             with open(self.settings_file, 'w', encoding='utf-8') as f:
@@ -655,6 +3033,28 @@ class LeitorRapidoApp:
                 self.cor_fundo_atual = config_data.get("cor_fundo", "white")
                 self.tamanho_fonte_atual = config_data.get("tamanho_fonte", 48)
                 self.nome_fonte_atual = config_data.get("nome_fonte", "Arial")
+                self.ocr_processos = config_data.get("ocr_processos", 0)
+                self.cache_limite_mb = config_data.get("cache_limite_mb", 200)
+                self.cache_ocr_limite_mb = config_data.get("cache_ocr_limite_mb", 500)
+                self.ocr_dois_niveis = config_data.get("ocr_dois_niveis", OPCOES_OCR_PADRAO["dois_niveis"])
+                self.ocr_dpi_rapido = config_data.get("ocr_dpi_rapido", OPCOES_OCR_PADRAO["dpi_rapido"])
+                self.ocr_dpi_alto = config_data.get("ocr_dpi_alto", OPCOES_OCR_PADRAO["dpi_alto"])
+                self.ocr_confianca_minima = config_data.get("ocr_confianca_minima", OPCOES_OCR_PADRAO["confianca_minima"])
+                self.ocr_em_lote = config_data.get("ocr_em_lote", OPCOES_OCR_PADRAO["em_lote"])
+                self.ocr_preprocessar = config_data.get("ocr_preprocessar", OPCOES_OCR_PADRAO["preprocessar"])
+                self.ocr_dividir_duplas = config_data.get("ocr_dividir_duplas", OPCOES_OCR_PADRAO["dividir_duplas"])
+                self.ocr_idioma = config_data.get("ocr_idioma", OPCOES_OCR_PADRAO["idioma"])
+                self.ocr_idiomas_documentos = config_data.get("ocr_idiomas_documentos", {})
+                self.pdf_extrator_texto = config_data.get("pdf_extrator_texto", "auto")
+                self.pdf_sob_demanda_paginas = config_data.get("pdf_sob_demanda_paginas", 0)
+                self.pdf_janela_paginas = config_data.get("pdf_janela_paginas", 8)
+                self.pdf_estrategia = config_data.get("pdf_estrategia", "auto")
+                self.remover_cabecalhos = config_data.get("remover_cabecalhos", True)
+                self.docx_tabelas = config_data.get("docx_tabelas", OPCOES_DOCX_PADRAO["tabelas"])
+                self.docx_caixas_texto = config_data.get("docx_caixas_texto", OPCOES_DOCX_PADRAO["caixas_texto"])
+                self.docx_notas_rodape = config_data.get("docx_notas_rodape", OPCOES_DOCX_PADRAO["notas_rodape"])
+                self.docx_notas_fim = config_data.get("docx_notas_fim", OPCOES_DOCX_PADRAO["notas_fim"])
+                self.docx_imagens = config_data.get("docx_imagens", OPCOES_DOCX_PADRAO["imagens"])
 
                 if hasattr(self, 'velocidade_scale'):
                     self.velocidade_scale.set(self.velocidade_leitura_atual)
@@ -666,12 +3066,14 @@ class LeitorRapidoApp:
         
     def on_closing(self):
         """Método chamado ao fechar a janela para salvar as configurações."""
+        self.cancelar_carregamento.set()
         self.salvar_configuracoes()
         self.master.destroy()
 
 
 # --- Inicializa a Aplicação Tkinter ---
 if __name__ == "__main__":
+    multiprocessing.freeze_support() # Necessário para o pool de OCR no executável gerado pelo PyInstaller
     root = tk.Tk()
     app = LeitorRapidoApp(root)
     root.mainloop()
\ No newline at end of file
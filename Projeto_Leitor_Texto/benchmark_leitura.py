@@ -0,0 +1,307 @@
+import argparse
+import concurrent.futures
+import difflib
+import hashlib
+import os
+import re
+import sys
+import time
+
+try:
+    import resource # Só existe em sistemas Unix
+except ImportError:
+    resource = None
+try:
+    import psutil # Opcional: pico de memória no Windows
+except ImportError:
+    psutil = None
+
+import PyPDF2
+from pdf2image import convert_from_path
+import pytesseract
+
+from Leitura_Rapida import (rasterizar_paginas_pdf, ocr_em_lote, iterar_paginas_pdf, preparar_imagem_ocr,
+                            texto_e_confianca_ocr, detectar_idioma_pdf, iterar_paragrafos_docx, iterar_paragrafos_txt,
+                            OCR_IDIOMA, OPCOES_DOCX_PADRAO)
+
+# Benchmarks do pipeline de leitura de PDFs.
+# Uso: python benchmark_leitura.py rasterizacao "livro_escaneado.pdf" --paginas 200
+#      python benchmark_leitura.py ocr-lote "livro_escaneado.pdf" --paginas 40 --lote 4
+#      python benchmark_leitura.py pipeline-ocr "livro_escaneado.pdf" --processos 4
+#      python benchmark_leitura.py preprocessamento "livro_escaneado.pdf" --paginas 10 --referencia "texto_correto.txt"
+#      python benchmark_leitura.py idioma "livro_escaneado.pdf" --paginas 10
+#      python benchmark_leitura.py docx "O_Senhor_dos_Aneis_Completo.docx"
+#      python benchmark_leitura.py txt "corpus_grande.txt"
+# Ao final de cada benchmark é exibido o pico de memória (RSS) do processo e dos subprocessos (pool, poppler, Tesseract).
+
+
+def _paginas_do_pdf(caminho_do_arquivo, limite):
+    with open(caminho_do_arquivo, 'rb') as arquivo_pdf:
+        num_pages = len(PyPDF2.PdfReader(arquivo_pdf).pages)
+    return list(range(min(num_pages, limite) if limite else num_pages))
+
+def _cronometrar(descricao, funcao, num_paginas):
+    inicio = time.perf_counter()
+    funcao()
+    duracao = time.perf_counter() - inicio
+    print(f"{descricao:<40} {duracao:8.2f} s   {num_paginas / duracao if duracao else 0:8.2f} páginas/s")
+    return duracao
+
+def _pico_memoria_mb():
+    """Pico de memória residente (MB) deste processo e o maior entre os subprocessos já encerrados, ou None se indisponível."""
+    if resource is not None:
+        # ru_maxrss vem em KB no Linux e em bytes no macOS
+        unidade = 1024 * 1024 if sys.platform == "darwin" else 1024
+        return (resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / unidade,
+                resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / unidade)
+    if psutil is not None:
+        info = psutil.Process().memory_info()
+        return getattr(info, "peak_wset", info.rss) / (1024 * 1024), None
+    return None, None
+
+def _mostrar_pico_memoria():
+    processo, subprocessos = _pico_memoria_mb()
+    if processo is None:
+        print("Pico de memória: indisponível (instale o psutil)")
+        return
+    texto = f"Pico de memória (RSS): {processo:.0f} MB neste processo"
+    if subprocessos is not None:
+        texto += f", {subprocessos:.0f} MB no maior subprocesso"
+    print(texto)
+
+def benchmark_rasterizacao(caminho_do_arquivo, limite_paginas=200, dpi=300, ocr=False):
+    """Compara a rasterização página a página (uma chamada ao poppler por página) com a rasterização em intervalos."""
+    paginas = _paginas_do_pdf(caminho_do_arquivo, limite_paginas)
+    print(f"Arquivo: {caminho_do_arquivo} ({len(paginas)} páginas, {dpi} DPI, OCR={'sim' if ocr else 'não'})")
+
+    def por_pagina():
+        for i in paginas:
+            images = convert_from_path(caminho_do_arquivo, first_page=i+1, last_page=i+1, dpi=dpi)
+            if ocr and images:
+                pytesseract.image_to_string(images[0], lang='por+eng')
+
+    def em_intervalos():
+        for i, imagem in rasterizar_paginas_pdf(caminho_do_arquivo, paginas, dpi=dpi):
+            if ocr:
+                pytesseract.image_to_string(imagem, lang='por+eng')
+
+    t_antigo = _cronometrar("convert_from_path por página", por_pagina, len(paginas))
+    t_novo = _cronometrar("rasterizar_paginas_pdf (intervalos)", em_intervalos, len(paginas))
+    if t_novo:
+        print(f"Ganho: {t_antigo / t_novo:.2f}x")
+
+def benchmark_ocr_lote(caminho_do_arquivo, limite_paginas=40, dpi=300, tamanho_lote=4, idioma=OCR_IDIOMA):
+    """Compara uma execução do Tesseract por página (image_to_string) com o OCR em lote."""
+    paginas = _paginas_do_pdf(caminho_do_arquivo, limite_paginas)
+    print(f"Arquivo: {caminho_do_arquivo} ({len(paginas)} páginas, {dpi} DPI, idioma {idioma}, lotes de {tamanho_lote})")
+    imagens = [imagem for i, imagem in rasterizar_paginas_pdf(caminho_do_arquivo, paginas, dpi=dpi)]
+
+    def por_pagina():
+        for imagem in imagens:
+            pytesseract.image_to_string(imagem, lang=idioma)
+
+    def em_lote():
+        for n in range(0, len(imagens), tamanho_lote):
+            ocr_em_lote(imagens[n:n + tamanho_lote], idioma)
+
+    t_antigo = _cronometrar("image_to_string por página", por_pagina, len(imagens))
+    t_novo = _cronometrar(f"ocr_em_lote ({tamanho_lote} páginas por execução)", em_lote, len(imagens))
+    if t_novo:
+        print(f"Ganho: {t_antigo / t_novo:.2f}x")
+
+def benchmark_pipeline_ocr(caminho_do_arquivo, num_processos=1):
+    """Mede o pipeline completo de leitura de um PDF (camada de texto, rasterização em disco e OCR) como o app o usa."""
+    estatisticas = {}
+    print(f"Arquivo: {caminho_do_arquivo} ({num_processos} processos)")
+    inicio = time.perf_counter()
+    paginas = sum(1 for _ in iterar_paginas_pdf(caminho_do_arquivo, num_processos, estatisticas=estatisticas))
+    duracao = time.perf_counter() - inicio
+    print(f"{paginas} páginas ({estatisticas.get('ocr', 0)} com OCR) em {duracao:.2f} s: "
+          f"{paginas / duracao if duracao else 0:.2f} páginas/s")
+
+def _similaridade_palavras(texto, referencia):
+    """Fração (0 a 1) das palavras da referência reconhecidas na mesma ordem."""
+    return difflib.SequenceMatcher(None, texto.lower().split(), referencia.lower().split(), autojunk=False).ratio()
+
+def benchmark_preprocessamento(caminho_do_arquivo, limite_paginas=10, dpi=300, idioma=OCR_IDIOMA, caminho_referencia=None,
+                               dividir_duplas=True):
+    """Compara tempo e qualidade do OCR das páginas cruas e depois de preparar_imagem_ocr."""
+    paginas = _paginas_do_pdf(caminho_do_arquivo, limite_paginas)
+    print(f"Arquivo: {caminho_do_arquivo} ({len(paginas)} páginas, {dpi} DPI, idioma {idioma})")
+    imagens = [imagem for i, imagem in rasterizar_paginas_pdf(caminho_do_arquivo, paginas, dpi=dpi)]
+    resultados = {}
+
+    def reconhecer(descricao, preparar):
+        def executar():
+            textos, confiancas, pixels = [], [], 0
+            for imagem in imagens:
+                for parte in preparar(imagem):
+                    pixels += parte.size[0] * parte.size[1]
+                    dados = pytesseract.image_to_data(parte, lang=idioma, output_type=pytesseract.Output.DICT)
+                    texto, confianca = texto_e_confianca_ocr(dados)
+                    textos.append(texto)
+                    confiancas.append(confianca)
+            resultados[descricao] = ("\n".join(textos), sum(confiancas) / len(confiancas) if confiancas else 0, pixels)
+        return _cronometrar(descricao, executar, len(imagens))
+
+    t_antigo = reconhecer("sem pré-processamento", lambda imagem: [imagem])
+    t_novo = reconhecer("preparar_imagem_ocr", lambda imagem: preparar_imagem_ocr(imagem, dividir_duplas))
+    if t_novo:
+        print(f"Ganho: {t_antigo / t_novo:.2f}x")
+
+    referencia = None
+    if caminho_referencia:
+        with open(caminho_referencia, 'r', encoding='utf-8') as arquivo:
+            referencia = arquivo.read()
+    for descricao, (texto, confianca, pixels) in resultados.items():
+        qualidade = f"confiança média {confianca:.1f}"
+        if referencia is not None:
+            qualidade += f", semelhança com a referência {_similaridade_palavras(texto, referencia):.1%}"
+        print(f"{descricao:<40} {pixels / 1e6:8.1f} Mpx   {qualidade}")
+
+def benchmark_idioma(caminho_do_arquivo, limite_paginas=10, dpi=300, idioma_fixo=OCR_IDIOMA):
+    """Compara o OCR com `idioma_fixo` com o OCR no idioma detectado por detectar_idioma_pdf."""
+    with open(caminho_do_arquivo, 'rb') as arquivo_pdf:
+        reader = PyPDF2.PdfReader(arquivo_pdf)
+        inicio = time.perf_counter()
+        idioma_detectado = detectar_idioma_pdf(caminho_do_arquivo, reader)
+        duracao_deteccao = time.perf_counter() - inicio
+    paginas = _paginas_do_pdf(caminho_do_arquivo, limite_paginas)
+    print(f"Arquivo: {caminho_do_arquivo} ({len(paginas)} páginas, {dpi} DPI), "
+          f"idioma detectado '{idioma_detectado}' em {duracao_deteccao * 1000:.0f} ms")
+    imagens = [imagem for i, imagem in rasterizar_paginas_pdf(caminho_do_arquivo, paginas, dpi=dpi)]
+    confiancas = {}
+
+    def reconhecer(idioma):
+        def executar():
+            resultados = ocr_em_lote(imagens, idioma)
+            confiancas[idioma] = sum(confianca for _, confianca in resultados) / len(resultados) if resultados else 0
+        return executar
+
+    t_antigo = _cronometrar(f"idioma fixo '{idioma_fixo}'", reconhecer(idioma_fixo), len(imagens))
+    t_novo = _cronometrar(f"idioma detectado '{idioma_detectado}'", reconhecer(idioma_detectado), len(imagens))
+    if t_novo:
+        print(f"Ganho: {t_antigo / t_novo:.2f}x")
+    for idioma, confianca in confiancas.items():
+        print(f"Confiança média com '{idioma}': {confianca:.1f}")
+
+def _ler_docx_python_docx(caminho_do_arquivo):
+    from docx import Document # Só para a comparação: o leitor não depende mais do python-docx
+    return [p.text for p in Document(caminho_do_arquivo).paragraphs]
+
+def _ler_docx_em_fluxo(caminho_do_arquivo):
+    # Só o corpo, como o doc.paragraphs do python-docx, para comparar o mesmo texto
+    so_corpo = {opcao: False for opcao in OPCOES_DOCX_PADRAO}
+    return list(iterar_paragrafos_docx(caminho_do_arquivo, opcoes_docx=so_corpo))
+
+def _medir_em_processo_novo(funcao, caminho_do_arquivo):
+    """Executa funcao(caminho) num processo novo. Retorna (duração, pico de RSS em MB, resultado)."""
+    inicio = time.perf_counter()
+    resultado = funcao(caminho_do_arquivo)
+    return time.perf_counter() - inicio, _pico_memoria_mb()[0], resultado
+
+def benchmark_docx(caminho_do_arquivo):
+    """Compara a leitura de um .docx pelo python-docx (Document(...).paragraphs) com a leitura em fluxo do XML."""
+    print(f"Arquivo: {caminho_do_arquivo} ({os.path.getsize(caminho_do_arquivo) / (1024 * 1024):.1f} MB)")
+    resultados = {}
+    for descricao, funcao in (("python-docx (Document)", _ler_docx_python_docx),
+                              ("iterar_paragrafos_docx (em fluxo)", _ler_docx_em_fluxo)):
+        with concurrent.futures.ProcessPoolExecutor(max_workers=1) as executor:
+            duracao, pico_mb, paragrafos = executor.submit(_medir_em_processo_novo, funcao, caminho_do_arquivo).result()
+        resultados[descricao] = paragrafos
+        pico = f"{pico_mb:8.0f} MB" if pico_mb is not None else "   indisponível"
+        print(f"{descricao:<40} {duracao:8.2f} s   pico de memória {pico}   {len(paragrafos)} parágrafos")
+    antigo, novo = resultados.values()
+    print("Mesmo texto nos dois leitores" if antigo == novo else "Aviso: os leitores retornaram textos diferentes")
+
+def _resumo_paragrafos(paragrafos):
+    """(quantidade, hash) dos parágrafos, consumidos um a um: compara os leitores sem guardar o texto na memória."""
+    resumo = hashlib.sha1()
+    n = 0
+    for paragrafo in paragrafos:
+        resumo.update(paragrafo.encode('utf-8') + b"\0")
+        n += 1
+    return n, resumo.hexdigest()
+
+def _ler_txt_inteiro(caminho_do_arquivo):
+    # Leitura antiga: o arquivo inteiro numa string e a lista completa de parágrafos
+    with open(caminho_do_arquivo, 'r', encoding='utf-8') as arquivo:
+        texto = arquivo.read()
+    paragrafos = [p.strip() for p in re.split(r'\n\s*\n', texto)]
+    return _resumo_paragrafos(p for p in paragrafos if p)
+
+def _ler_txt_em_blocos(caminho_do_arquivo):
+    return _resumo_paragrafos(iterar_paragrafos_txt(caminho_do_arquivo))
+
+def benchmark_txt(caminho_do_arquivo):
+    """Compara a leitura de um .txt inteiro (read() + re.split) com a leitura em blocos do arquivo mapeado em memória."""
+    print(f"Arquivo: {caminho_do_arquivo} ({os.path.getsize(caminho_do_arquivo) / (1024 * 1024):.1f} MB)")
+    resultados = {}
+    for descricao, funcao in (("read() + re.split", _ler_txt_inteiro),
+                              ("iterar_paragrafos_txt (mmap, em blocos)", _ler_txt_em_blocos)):
+        with concurrent.futures.ProcessPoolExecutor(max_workers=1) as executor:
+            duracao, pico_mb, (n, resumo) = executor.submit(_medir_em_processo_novo, funcao, caminho_do_arquivo).result()
+        resultados[descricao] = resumo
+        pico = f"{pico_mb:8.0f} MB" if pico_mb is not None else "   indisponível"
+        print(f"{descricao:<40} {duracao:8.2f} s   pico de memória {pico}   {n} parágrafos")
+    antigo, novo = resultados.values()
+    print("Mesmos parágrafos nos dois leitores" if antigo == novo else "Aviso: os leitores retornaram parágrafos diferentes")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmarks do Leitor Rápido.")
+    subparsers = parser.add_subparsers(dest="comando", required=True)
+
+    p_rasterizacao = subparsers.add_parser("rasterizacao", help="Poppler por página x em intervalos")
+    p_rasterizacao.add_argument("pdf")
+    p_rasterizacao.add_argument("--paginas", type=int, default=200)
+    p_rasterizacao.add_argument("--dpi", type=int, default=300)
+    p_rasterizacao.add_argument("--ocr", action="store_true", help="Inclui o OCR de cada página na medição")
+
+    p_ocr_lote = subparsers.add_parser("ocr-lote", help="Tesseract por página x em lote")
+    p_ocr_lote.add_argument("pdf")
+    p_ocr_lote.add_argument("--paginas", type=int, default=40)
+    p_ocr_lote.add_argument("--dpi", type=int, default=300)
+    p_ocr_lote.add_argument("--lote", type=int, default=4, help="Páginas por execução do Tesseract")
+    p_ocr_lote.add_argument("--idioma", default=OCR_IDIOMA)
+
+    p_pipeline = subparsers.add_parser("pipeline-ocr", help="Leitura completa de um PDF, com OCR")
+    p_pipeline.add_argument("pdf")
+    p_pipeline.add_argument("--processos", type=int, default=max(1, (os.cpu_count() or 1) - 1))
+
+    p_preprocessamento = subparsers.add_parser("preprocessamento", help="OCR com e sem endireitar/recortar as páginas")
+    p_preprocessamento.add_argument("pdf")
+    p_preprocessamento.add_argument("--paginas", type=int, default=10)
+    p_preprocessamento.add_argument("--dpi", type=int, default=300)
+    p_preprocessamento.add_argument("--idioma", default=OCR_IDIOMA)
+    p_preprocessamento.add_argument("--referencia", help="Arquivo .txt com o texto correto das páginas, para medir a qualidade")
+    p_preprocessamento.add_argument("--sem-duplas", action="store_true", help="Não separa páginas duplas")
+
+    p_idioma = subparsers.add_parser("idioma", help="OCR com o idioma fixo x com o idioma detectado")
+    p_idioma.add_argument("pdf")
+    p_idioma.add_argument("--paginas", type=int, default=10)
+    p_idioma.add_argument("--dpi", type=int, default=300)
+    p_idioma.add_argument("--idioma-fixo", default=OCR_IDIOMA)
+
+    p_docx = subparsers.add_parser("docx", help="python-docx x leitura em fluxo do XML")
+    p_docx.add_argument("docx")
+
+    p_txt = subparsers.add_parser("txt", help="Arquivo inteiro na memória x leitura em blocos com mmap")
+    p_txt.add_argument("txt")
+
+    args = parser.parse_args()
+    if args.comando == "rasterizacao":
+        benchmark_rasterizacao(args.pdf, args.paginas, args.dpi, args.ocr)
+    elif args.comando == "ocr-lote":
+        benchmark_ocr_lote(args.pdf, args.paginas, args.dpi, args.lote, args.idioma)
+    elif args.comando == "pipeline-ocr":
+        benchmark_pipeline_ocr(args.pdf, args.processos)
+    elif args.comando == "preprocessamento":
+        benchmark_preprocessamento(args.pdf, args.paginas, args.dpi, args.idioma, args.referencia, not args.sem_duplas)
+    elif args.comando == "idioma":
+        benchmark_idioma(args.pdf, args.paginas, args.dpi, args.idioma_fixo)
+    elif args.comando == "docx":
+        benchmark_docx(args.docx)
+    elif args.comando == "txt":
+        benchmark_txt(args.txt)
+    _mostrar_pico_memoria()
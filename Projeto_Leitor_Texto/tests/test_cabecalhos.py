@@ -0,0 +1,60 @@
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from Leitura_Rapida import TrechoPagina, remover_cabecalhos_e_rodapes, _numero_pagina
+
+
+FRASES = ["Era uma vez um hobbit.", "Ele morava num buraco.", "O buraco era confortável.", "Tinha portas redondas.",
+          "Gostava de comer bem.", "Recebia poucas visitas.", "Um dia chegou um mago.", "O mago trazia anões."]
+
+
+def paginas(corpos, cabecalho="O SENHOR DOS ANÉIS", primeiro_numero=11):
+    return [TrechoPagina(i, "texto", f"{cabecalho}\n{corpo}\n{primeiro_numero + i}") for i, corpo in enumerate(corpos)]
+
+
+class NumeroPaginaTeste(unittest.TestCase):
+    def test_numerais_validos(self):
+        self.assertEqual(_numero_pagina("12"), 12)
+        self.assertEqual(_numero_pagina("— 12 —"), 12)
+        self.assertEqual(_numero_pagina("Página 3 de 10"), 3)
+        self.assertEqual(_numero_pagina("xiv"), 14)
+        self.assertEqual(_numero_pagina("XIV"), 14)
+
+    def test_palavras_parecidas_com_romanos(self):
+        for linha in ("Vivi.", "Li.", "— Vi.", "Civil.", "lili", "xIv", "iiii"):
+            self.assertIsNone(_numero_pagina(linha), linha)
+
+
+class RemoverCabecalhosTeste(unittest.TestCase):
+    def test_remove_cabecalho_e_numero(self):
+        trechos = list(remover_cabecalhos_e_rodapes(paginas(FRASES)))
+        self.assertEqual([t.texto.strip() for t in trechos], FRASES)
+
+    def test_numero_sem_sequencia_fica(self):
+        corpos = FRASES[:3] + ["Ele nasceu em\n1984"] + FRASES[3:]
+        trechos = [TrechoPagina(i, "texto", corpo) for i, corpo in enumerate(corpos)]
+        textos = [t.texto for t in remover_cabecalhos_e_rodapes(trechos)]
+        self.assertIn("1984", textos[3])
+
+    def test_linhas_curtas_ficam(self):
+        corpos = ["Vivi.", "Li.", "— Vi.", "Civil.", "lili"]
+        trechos = [TrechoPagina(i, "texto", f"{frase}\n{c}") for i, (frase, c) in enumerate(zip(FRASES, corpos))]
+        self.assertEqual([t.texto for t in remover_cabecalhos_e_rodapes(trechos)], [t.texto for t in trechos])
+
+    def test_entrega_sem_esperar_o_documento(self):
+        entregues = []
+
+        def gerar():
+            for trecho in paginas(FRASES * 3):
+                entregues.append(trecho.pagina)
+                yield trecho
+
+        primeira = next(remover_cabecalhos_e_rodapes(gerar()))
+        self.assertEqual(primeira.pagina, 0)
+        self.assertLessEqual(len(entregues), 3)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,52 @@
+import os
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from Leitura_Rapida import CacheDisco
+
+
+class CacheDiscoTeste(unittest.TestCase):
+    def setUp(self):
+        self.pasta = tempfile.TemporaryDirectory()
+        self.cache = CacheDisco(self.pasta.name, 1000)
+
+    def tearDown(self):
+        self.pasta.cleanup()
+
+    def test_entrada_maior_que_o_limite_nao_esvazia_o_cache(self):
+        for n in range(5):
+            self.cache.gravar(f"e{n}", b"x" * 100)
+        self.assertFalse(self.cache.gravar("grande", b"x" * 2000))
+        self.assertEqual(self.cache.informacoes(), (5, 500))
+        self.assertIsNone(self.cache.ler("grande"))
+
+    def test_poda_preserva_a_entrada_gravada(self):
+        for n in range(5):
+            self.cache.gravar(f"e{n}", b"x" * 150)
+            futuro = 2 ** 33 # Entradas "mais recentes" que a nova: mesmo assim a nova não pode ser removida
+            os.utime(self.cache.caminho(f"e{n}"), (futuro, futuro))
+        self.assertTrue(self.cache.gravar("nova", b"y" * 400))
+        self.assertEqual(self.cache.ler("nova"), b"y" * 400)
+        self.assertLessEqual(self.cache.informacoes()[1], 1000)
+
+    def test_sobrescrever_nao_infla_a_ocupacao(self):
+        for n in range(4):
+            self.cache.gravar(f"e{n}", b"x" * 200)
+        for _ in range(10):
+            self.cache.gravar("e0", b"y" * 200)
+        self.assertEqual(self.cache.bytes_ocupados, 800)
+        self.assertEqual(self.cache.informacoes(), (4, 800)) # Nenhuma entrada válida podada
+
+    def test_lru(self):
+        for n in range(6):
+            self.cache.gravar(f"e{n}", b"x" * 200)
+            os.utime(self.cache.caminho(f"e{n}"), (n, n))
+        self.cache.podar()
+        self.assertIsNone(self.cache.ler("e0"))
+        self.assertIsNotNone(self.cache.ler("e5"))
+
+
+if __name__ == "__main__":
+    unittest.main()
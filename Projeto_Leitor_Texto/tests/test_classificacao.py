@@ -0,0 +1,55 @@
+import os
+import sys
+import tempfile
+import unittest
+
+import PyPDF2
+from PIL import Image
+from reportlab.lib.pagesizes import A4
+from reportlab.lib.utils import ImageReader
+from reportlab.pdfgen import canvas
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from Leitura_Rapida import classificar_pagina_pdf
+
+
+class ClassificacaoPaginaTeste(unittest.TestCase):
+    def setUp(self):
+        self.pasta = tempfile.TemporaryDirectory()
+        self.caminho = os.path.join(self.pasta.name, "paginas.pdf")
+        largura, altura = A4
+        imagem = Image.new("L", (60, 80), 200)
+        pdf = canvas.Canvas(self.caminho, pagesize=A4)
+        pdf.drawInlineImage(imagem, 0, 0, largura, altura) # Página escaneada como imagem embutida (BI/ID/EI)
+        pdf.showPage()
+        pdf.drawImage(ImageReader(imagem), 0, 0, largura, altura) # A mesma imagem como XObject
+        pdf.showPage()
+        pdf.drawString(72, 700, "Capítulo 1") # Pouco texto e nenhuma imagem
+        pdf.showPage()
+        pdf.drawInlineImage(imagem, 72, 72, 40, 40) # Imagem embutida pequena
+        pdf.showPage()
+        pdf.save()
+        self.arquivo = open(self.caminho, 'rb')
+        self.reader = PyPDF2.PdfReader(self.arquivo)
+
+    def tearDown(self):
+        self.arquivo.close()
+        self.pasta.cleanup()
+
+    def classificar(self, i):
+        page = self.reader.pages[i]
+        return classificar_pagina_pdf(page, page.extract_text() or "")
+
+    def test_imagem_embutida_vai_para_o_ocr(self):
+        self.assertEqual(self.classificar(0), "digitalizada")
+
+    def test_imagem_xobject_vai_para_o_ocr(self):
+        self.assertEqual(self.classificar(1), "digitalizada")
+
+    def test_paginas_curtas(self):
+        self.assertEqual(self.classificar(2), "curta")
+        self.assertEqual(self.classificar(3), "curta")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,59 @@
+import os
+import sys
+import tempfile
+import unittest
+
+import docx
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from Leitura_Rapida import iterar_trechos_docx
+
+SEM_EXTRAS = {"tabelas": False, "caixas_texto": False, "notas_rodape": False, "notas_fim": False, "imagens": False}
+
+
+class LeitorDocxTeste(unittest.TestCase):
+    def setUp(self):
+        self.pasta = tempfile.TemporaryDirectory()
+        self.caminho = os.path.join(self.pasta.name, "documento.docx")
+        documento = docx.Document()
+        documento.add_heading("Capítulo 1", level=1)
+        documento.add_paragraph("Primeiro parágrafo, com acentuação e símbolos: ç ã € 日本.")
+        documento.add_paragraph("")
+        paragrafo = documento.add_paragraph("Vários ")
+        paragrafo.add_run("trechos").bold = True
+        paragrafo.add_run(" com\ttabulação e quebra").add_break()
+        paragrafo.add_run("de linha.")
+        tabela = documento.add_table(rows=2, cols=2)
+        for i, celula in enumerate(tabela._cells):
+            celula.text = f"Célula {i}"
+        documento.add_heading("Seção 1.1", level=2)
+        for i in range(50):
+            documento.add_paragraph(f"Parágrafo {i} do corpo.")
+        documento.save(self.caminho)
+        self.documento = docx.Document(self.caminho)
+
+    def tearDown(self):
+        self.pasta.cleanup()
+
+    def test_igual_ao_python_docx_sem_extras(self):
+        trechos = list(iterar_trechos_docx(self.caminho, opcoes_docx=SEM_EXTRAS))
+        self.assertEqual([trecho.texto for trecho in trechos], [p.text for p in self.documento.paragraphs])
+        self.assertTrue(all(trecho.origem == "texto" for trecho in trechos))
+
+    def test_tabelas_na_ordem_do_documento(self):
+        trechos = list(iterar_trechos_docx(self.caminho, opcoes_docx=dict(SEM_EXTRAS, tabelas=True)))
+        celulas = [trecho.texto for trecho in trechos if trecho.origem == "tabela"]
+        self.assertEqual(celulas, [p.text for celula in self.documento.tables[0]._cells for p in celula.paragraphs])
+        self.assertEqual([trecho.texto for trecho in trechos if trecho.origem == "texto"],
+                         [p.text for p in self.documento.paragraphs])
+        posicao_tabela = [trecho.origem for trecho in trechos].index("tabela")
+        self.assertEqual(trechos[posicao_tabela - 1].texto, self.documento.paragraphs[3].text)
+
+    def test_niveis_de_titulo(self):
+        titulos = [(trecho.texto, trecho.nivel_titulo) for trecho in iterar_trechos_docx(self.caminho, opcoes_docx=SEM_EXTRAS)
+                   if trecho.nivel_titulo is not None]
+        self.assertEqual(titulos, [("Capítulo 1", 0), ("Seção 1.1", 1)])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,63 @@
+import os
+import sys
+import tempfile
+import unittest
+import zipfile
+
+import docx
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from Leitura_Rapida import iterar_trechos_docx
+
+NS_W = "http://schemas.openxmlformats.org/wordprocessingml/2006/main"
+NOTAS_RODAPE = (f'<w:footnotes xmlns:w="{NS_W}">'
+                '<w:footnote w:type="separator" w:id="-1"><w:p><w:r><w:separator/></w:r></w:p></w:footnote>'
+                '<w:footnote w:id="1"><w:p><w:r><w:t>Texto da nota.</w:t></w:r></w:p></w:footnote>'
+                '</w:footnotes>')
+RELACAO = ('<Relationship Id="rIdNotas" Target="footnotes.xml" '
+           'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/footnotes"/>')
+CITACAO = '<w:r><w:footnoteReference w:id="1"/></w:r></w:p>'
+
+
+def criar_docx_com_notas(caminho):
+    """Três parágrafos; os dois primeiros citam a mesma nota de rodapé (python-docx não cria notas)."""
+    documento = docx.Document()
+    for texto in ("Primeiro.", "Segundo.", "Terceiro."):
+        documento.add_paragraph(texto)
+    base = caminho + ".base"
+    documento.save(base)
+    with zipfile.ZipFile(base) as origem, zipfile.ZipFile(caminho, 'w') as destino:
+        for item in origem.infolist():
+            dados = origem.read(item.filename)
+            if item.filename == "word/document.xml":
+                texto = dados.decode('utf-8')
+                for paragrafo in ("Primeiro.", "Segundo."):
+                    inicio = texto.index(paragrafo)
+                    fim = texto.index("</w:p>", inicio)
+                    texto = texto[:fim] + CITACAO + texto[fim + len("</w:p>"):]
+                dados = texto.encode('utf-8')
+            elif item.filename == "word/_rels/document.xml.rels":
+                dados = dados.replace(b"</Relationships>", RELACAO.encode('utf-8') + b"</Relationships>")
+            destino.writestr(item, dados)
+        destino.writestr("word/footnotes.xml", NOTAS_RODAPE)
+    os.remove(base)
+
+
+class NotasDocxTeste(unittest.TestCase):
+    def setUp(self):
+        self.pasta = tempfile.TemporaryDirectory()
+        self.caminho = os.path.join(self.pasta.name, "notas.docx")
+        criar_docx_com_notas(self.caminho)
+
+    def tearDown(self):
+        self.pasta.cleanup()
+
+    def test_nota_citada_duas_vezes(self):
+        trechos = [(trecho.origem, trecho.texto) for trecho in iterar_trechos_docx(self.caminho)]
+        self.assertEqual(trechos, [("texto", "Primeiro."), ("nota_rodape", "[1] Texto da nota."),
+                                   ("texto", "Segundo."), ("nota_rodape", "[2] Texto da nota."),
+                                   ("texto", "Terceiro.")])
+
+
+if __name__ == "__main__":
+    unittest.main()
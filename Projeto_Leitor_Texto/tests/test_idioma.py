@@ -0,0 +1,37 @@
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from Leitura_Rapida import detectar_idioma_texto
+
+PORTUGUES = ("O menino não sabia que a casa da avó era muito mais longe do que ele pensava, mas foi com ela para a cidade "
+             "quando o pai dele também estava lá. Isso é uma coisa que os dois fizeram pelo caminho. ") * 6
+INGLES = ("The boy did not know that the house of his grandmother was far from the city, and it was the place which they "
+          "had seen before. This is what they were told by her. ") * 6
+ESPANHOL = ("El niño no sabía que la casa de la abuela estaba muy lejos de la ciudad, pero fue con ella cuando el padre "
+            "también estaba allí. Esto es lo que hay para los dos, ya que sus amigos fueron por el camino. ") * 6
+
+
+class DetectarIdiomaTextoTeste(unittest.TestCase):
+    def test_um_idioma(self):
+        self.assertEqual(detectar_idioma_texto(PORTUGUES), "por")
+        self.assertEqual(detectar_idioma_texto(INGLES), "eng")
+        self.assertEqual(detectar_idioma_texto(ESPANHOL), "spa")
+
+    def test_dois_idiomas_sem_extras(self):
+        self.assertEqual(sorted(detectar_idioma_texto(PORTUGUES + INGLES).split("+")), ["eng", "por"])
+        self.assertEqual(sorted(detectar_idioma_texto(ESPANHOL + INGLES).split("+")), ["eng", "spa"])
+
+    def test_no_maximo_dois_idiomas(self):
+        self.assertEqual(len(detectar_idioma_texto(PORTUGUES + INGLES + ESPANHOL).split("+")), 2)
+
+    def test_poucas_palavras_do_segundo_idioma(self):
+        self.assertEqual(detectar_idioma_texto(PORTUGUES * 3 + INGLES[:120]), "por")
+
+    def test_texto_curto(self):
+        self.assertIsNone(detectar_idioma_texto("Olá mundo"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,43 @@
+import os
+import subprocess
+import sys
+import unittest
+from unittest import mock
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import Leitura_Rapida
+from Leitura_Rapida import OPCOES_OCR_PADRAO, _ocr_intervalo_pdf
+
+
+def rasterizar_falso(caminho, paginas, dpi=300, tamanho_lote=8, grayscale=False, pasta_saida=None, tempo_limite_pagina=None):
+    for i in paginas:
+        caminho_pagina = os.path.join(pasta_saida, f"p{i}-{dpi}.png")
+        with open(caminho_pagina, "w") as f:
+            f.write(f"{i} {dpi}")
+        yield i, caminho_pagina
+
+
+class OcrTempoLimiteTeste(unittest.TestCase):
+    def test_lote_esgotado_repete_cada_pagina_na_mesma_resolucao(self):
+        chamadas = []
+
+        def ocr_em_lote_falso(caminhos, idioma, tempo_limite):
+            paginas = []
+            for caminho in caminhos:
+                with open(caminho) as f:
+                    paginas.append(tuple(map(int, f.read().split())))
+            chamadas.append(paginas)
+            if any(pagina == 2 and dpi == 150 for pagina, dpi in paginas): # A página 3 trava em 150 DPI
+                raise subprocess.TimeoutExpired("tesseract", tempo_limite)
+            return [(f"texto {pagina}", 95) for pagina, _ in paginas]
+
+        opcoes = dict(OPCOES_OCR_PADRAO, idioma="por", preprocessar=False, dois_niveis=False, dpi_alto=150)
+        with mock.patch.object(Leitura_Rapida, "rasterizar_paginas_pdf", rasterizar_falso), \
+             mock.patch.object(Leitura_Rapida, "ocr_em_lote", ocr_em_lote_falso):
+            resultado = _ocr_intervalo_pdf("livro.pdf", 0, 3, opcoes)
+        self.assertEqual(resultado, [(0, "texto 0", 150), (1, "texto 1", 150), (2, "texto 2", 75), (3, "texto 3", 150)])
+        self.assertEqual(chamadas[-1], [(2, 75)])
+
+
+if __name__ == "__main__":
+    unittest.main()
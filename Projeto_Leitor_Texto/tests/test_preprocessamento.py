@@ -0,0 +1,37 @@
+import os
+import sys
+import unittest
+
+from PIL import Image, ImageDraw
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from Leitura_Rapida import preparar_imagem_ocr
+
+
+def pagina(largura, altura, colunas):
+    """Imagem com blocos de "palavras" (retângulos pretos) em cada coluna de texto (x0, x1)."""
+    imagem = Image.new("L", (largura, altura), 255)
+    desenho = ImageDraw.Draw(imagem)
+    for x0, x1 in colunas:
+        for y in range(40, altura - 40, 14):
+            for x in range(x0, x1 - 30, 26):
+                desenho.rectangle((x, y, x + 20, y + 6), fill=0)
+    return imagem
+
+
+class DividirDuplasTeste(unittest.TestCase):
+    def test_livro_aberto_e_dividido(self):
+        self.assertEqual(len(preparar_imagem_ocr(pagina(1200, 800, [(60, 560), (640, 1140)]))), 2)
+
+    def test_pagina_deitada_nao_e_dividida(self):
+        self.assertEqual(len(preparar_imagem_ocr(pagina(1200, 800, [(60, 1140)]))), 1)
+
+    def test_tabela_nao_e_dividida(self):
+        self.assertEqual(len(preparar_imagem_ocr(pagina(1200, 800, [(60, 450), (500, 700), (750, 1140)]))), 1)
+
+    def test_opcao_desligada(self):
+        self.assertEqual(len(preparar_imagem_ocr(pagina(1200, 800, [(60, 560), (640, 1140)]), dividir_duplas=False)), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,84 @@
+import os
+import queue
+import sys
+import tempfile
+import threading
+import types
+import unittest
+from unittest import mock
+
+from reportlab.pdfgen import canvas
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import Leitura_Rapida
+from Leitura_Rapida import CacheDisco, LeitorRapidoApp
+
+NUM_PAGINAS = 30
+JANELA = 8
+
+
+def criar_pdf(caminho):
+    pdf = canvas.Canvas(caminho)
+    for i in range(NUM_PAGINAS):
+        pdf.drawString(72, 800, "O SENHOR DOS ANEIS")
+        marca = chr(97 + i % 26) * 3 + chr(97 + i // 26) # Corpo diferente em cada página (os números não contam)
+        for n, y in enumerate((700, 680, 660)):
+            pdf.drawString(72, y, f"Texto {marca} da página, linha {n}, longo o bastante para dispensar a análise de imagens.")
+        pdf.drawString(300, 40, str(i + 1))
+        pdf.showPage()
+    pdf.save()
+
+
+class CarregamentoSobDemandaTeste(unittest.TestCase):
+    def setUp(self):
+        self.pasta = tempfile.TemporaryDirectory()
+        self.caminho = os.path.join(self.pasta.name, "livro.pdf")
+        criar_pdf(self.caminho)
+
+    def tearDown(self):
+        self.pasta.cleanup()
+
+    def carregar(self, estrategia="texto"):
+        """Roda o carregamento sob demanda com o cursor andando página a página, como na leitura."""
+        app = types.SimpleNamespace(pagina_cursor=0, pdf_janela_paginas=JANELA, remover_cabecalhos=True,
+                                    cache_ocr=CacheDisco(os.path.join(self.pasta.name, "ocr"), 10 ** 6))
+        fila = queue.Queue()
+        paginas = {}
+        thread = threading.Thread(target=LeitorRapidoApp.executar_carregamento_sob_demanda,
+                                  args=(app, self.caminho, fila, threading.Event(), 1, Leitura_Rapida.OPCOES_OCR_PADRAO,
+                                        "pypdf2", estrategia))
+        thread.start()
+        while True:
+            mensagem = fila.get(timeout=30)
+            if mensagem[0] == "pagina":
+                paginas[mensagem[1]] = " ".join(mensagem[2])
+                while app.pagina_cursor in paginas and app.pagina_cursor < NUM_PAGINAS - 1:
+                    app.pagina_cursor += 1
+            elif mensagem[0] in ("concluido", "erro"):
+                break
+        thread.join()
+        self.assertEqual(mensagem[0], "concluido")
+        return paginas
+
+    def test_extrai_a_camada_de_texto_em_blocos(self):
+        original = Leitura_Rapida._extrair_bloco_texto_pdf
+        with mock.patch.object(Leitura_Rapida, "_extrair_bloco_texto_pdf", side_effect=original) as extrair:
+            paginas = self.carregar()
+        self.assertEqual(len(paginas), NUM_PAGINAS)
+        self.assertLess(extrair.call_count, NUM_PAGINAS // 2)
+
+    def test_remove_cabecalhos_desde_a_primeira_pagina(self):
+        paginas = self.carregar()
+        for i, texto in paginas.items():
+            self.assertNotIn("SENHOR", texto, i)
+            self.assertTrue(texto.startswith("Texto"), texto)
+            self.assertTrue(texto.endswith("imagens."), texto) # O número da página também sai
+
+    def test_respeita_a_estrategia(self):
+        with mock.patch.object(Leitura_Rapida, "classificar_pagina_pdf", return_value="texto") as classificar:
+            self.carregar("texto")
+        classificar.assert_not_called() # Todas as páginas têm texto de sobra: "texto" não examina as imagens
+
+
+if __name__ == "__main__":
+    unittest.main()
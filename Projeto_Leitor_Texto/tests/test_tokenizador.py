@@ -0,0 +1,74 @@
+import os
+import random
+import re
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from Leitura_Rapida import TokenizadorIncremental, preprocessar_texto
+
+
+def preprocessar_texto_original(texto_bruto_extraido):
+    """Oráculo: a limpeza e a heurística de parágrafos originais, aplicadas ao texto inteiro de uma vez."""
+    processed_text = re.sub(r'(\w+)-\s*?\n*\s*?(\w+)', r'\1\2', texto_bruto_extraido)
+    processed_text = re.sub(r'([a-zA-Záéíóúçãõâêôàüñ])-([a-zA-Záéíóúçãõâêôàüñ])', r'\1\2', processed_text)
+    processed_text = processed_text.replace('\n', ' ')
+    processed_text = re.sub(r'\|\[\d+\]', '', processed_text)
+    processed_text = re.sub(r'\s+', ' ', processed_text).strip()
+    palavras = re.findall(r'\S+', processed_text)
+
+    paragraph_start_indices = [0]
+    for i, palavra in enumerate(palavras):
+        if re.search(r'[.!?]$', palavra):
+            if i + 1 < len(palavras) and not re.match(r'^[.,!?;:]+$', palavras[i+1]) and not palavras[i+1].isdigit():
+                paragraph_start_indices.append(i + 1)
+    paragraph_start_indices = sorted(list(set(paragraph_start_indices)))
+    if paragraph_start_indices and paragraph_start_indices[-1] >= len(palavras) - 1:
+        if len(paragraph_start_indices) > 1:
+            paragraph_start_indices.pop()
+        else:
+            paragraph_start_indices = [0]
+    return palavras, paragraph_start_indices
+
+
+def tokenizar_em_trechos(texto, cortes):
+    """Alimenta o tokenizador com o texto cortado nas posições dadas e junta o que ele devolve."""
+    tokenizador = TokenizadorIncremental()
+    palavras, indices = [], []
+    inicio = 0
+    for fim in sorted(cortes) + [len(texto)]:
+        novas_palavras, novos_indices = tokenizador.alimentar(texto[inicio:fim])
+        palavras += novas_palavras
+        indices += novos_indices
+        inicio = fim
+    novas_palavras, novos_indices = tokenizador.finalizar()
+    return palavras + novas_palavras, (indices + novos_indices) or [0]
+
+
+class TokenizadorIncrementalTeste(unittest.TestCase):
+    def test_igual_ao_tokenizador_original(self):
+        # Hífens de fim de linha, pontuação solta, números e referências "|[N]" cortados em qualquer ponto
+        pecas = ["esfarra-", "-", "pados", "ação", " ", "  ", "\n", "\n\n", " -\n ", "fim.", "Sim!", "Será?", ".", "...",
+                 "1.", "2", "Capítulo", "|[3]", "pr-e", "\t"]
+        sorteio = random.Random(1)
+        for _ in range(2000):
+            texto = "".join(sorteio.choice(pecas) for _ in range(sorteio.randint(0, 40)))
+            cortes = [sorteio.randint(0, len(texto)) for _ in range(sorteio.randint(0, 8))]
+            esperado = preprocessar_texto_original(texto)
+            self.assertEqual(preprocessar_texto(texto), esperado, repr(texto))
+            self.assertEqual(tokenizar_em_trechos(texto, cortes), esperado, repr((texto, sorted(cortes))))
+
+    def test_palavra_hifenizada_entre_trechos(self):
+        tokenizador = TokenizadorIncremental()
+        self.assertEqual(tokenizador.alimentar("Os mendigos esfarra-"), (["Os", "mendigos"], [0]))
+        self.assertEqual(tokenizador.alimentar("\npados chegaram."), (["esfarrapados"], []))
+        self.assertEqual(tokenizador.finalizar(), (["chegaram."], []))
+
+    def test_posicao_atual_conta_a_cauda(self):
+        tokenizador = TokenizadorIncremental()
+        tokenizador.alimentar("uma frase curta")
+        self.assertEqual(tokenizador.posicao_atual(), 3)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,63 @@
+import os
+import random
+import re
+import sys
+import tempfile
+import unittest
+from unittest import mock
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import Leitura_Rapida
+from Leitura_Rapida import iterar_paragrafos_txt
+
+
+def paragrafos_originais(caminho):
+    """Oráculo: o leitor original, que lê o arquivo inteiro e o divide com re.split em linhas em branco."""
+    with open(caminho, 'r', encoding='utf-8') as arquivo:
+        full_text = arquivo.read()
+    return [p.strip() for p in re.split(r'\n\s*\n', full_text) if p.strip()]
+
+
+class LeitorTxtTeste(unittest.TestCase):
+    def setUp(self):
+        self.pasta = tempfile.TemporaryDirectory()
+        self.caminho = os.path.join(self.pasta.name, "texto.txt")
+
+    def tearDown(self):
+        self.pasta.cleanup()
+
+    def gravar(self, dados):
+        with open(self.caminho, 'wb') as f:
+            f.write(dados)
+
+    def test_igual_ao_leitor_original(self):
+        # Blocos minúsculos cortam caracteres de vários bytes e \r\n entre um bloco e outro; inclui os espaços
+        # Unicode (\x85, \u2028...) que o \s do re.split aceita numa linha em branco
+        pecas = ["ação", "日本語", "😀", " ", "\t", "\n", "\n\n", "\r\n", "\r\n\r\n", "\r", "  \n \n", "palavra", "x" * 7,
+                 "\x0c", "\x0b", "\x85", "\u2028", "\x1c", "\u3000"]
+        sorteio = random.Random(1)
+        for _ in range(2000):
+            texto = "".join(sorteio.choice(pecas) for _ in range(sorteio.randint(0, 60)))
+            self.gravar(texto.encode('utf-8'))
+            with mock.patch.object(Leitura_Rapida, "TXT_BLOCO_BYTES", sorteio.choice([1, 2, 3, 5, 7, 64])):
+                self.assertEqual(list(iterar_paragrafos_txt(self.caminho)), paragrafos_originais(self.caminho),
+                                 repr(texto))
+
+    def test_paragrafo_longo_em_pedacos(self):
+        self.gravar(b"um dois tres quatro cinco seis sete oito nove dez onze\n\nabcdefghijklmnopqrstuvwxyz")
+        with mock.patch.object(Leitura_Rapida, "TXT_BLOCO_BYTES", 4), mock.patch.object(Leitura_Rapida, "TXT_PARAGRAFO_MAXIMO", 10):
+            paragrafos = list(iterar_paragrafos_txt(self.caminho))
+        self.assertEqual(" ".join(paragrafos), "um dois tres quatro cinco seis sete oito nove dez onze abcdefghij klmnopqrst uvwxyz")
+        self.assertTrue(all(len(paragrafo) <= 10 for paragrafo in paragrafos))
+
+    def test_bom_e_bytes_invalidos(self):
+        self.gravar(b"\xef\xbb\xbfbom\n\nin\xffvalido")
+        self.assertEqual(list(iterar_paragrafos_txt(self.caminho)), ["bom", "in�valido"])
+
+    def test_arquivo_vazio(self):
+        self.gravar(b"")
+        self.assertEqual(list(iterar_paragrafos_txt(self.caminho)), [])
+
+
+if __name__ == "__main__":
+    unittest.main()